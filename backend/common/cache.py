@@ -0,0 +1,185 @@
+"""
+만료 시간(TTL)과 최대 크기(LRU)를 가진 메모리 캐시를 제공합니다.
+같은 키에 대한 동시 조회는 한 번의 원본 호출로 합쳐서(coalescing) 처리합니다.
+재시작 후에도 유지해야 하는 값은 SQLite 파일 기반의 SQLiteStore에 저장할 수 있습니다.
+"""
+import asyncio
+import json
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable, Optional
+
+_MISSING = object()
+_PUNCTUATION_RE = re.compile(r"[^\w\s]")
+
+
+def normalize_key(text: str) -> str:
+    """대소문자, 문장부호, 연속 공백 차이를 없애 거의 같은 문장이 같은 캐시 키를 갖도록 합니다."""
+    return " ".join(_PUNCTUATION_RE.sub(" ", text.lower()).split())
+
+
+class TTLCache:
+    """
+    키별로 만료 시간을 두는 LRU 캐시입니다.
+    - get/set: 일반 캐시 조회 및 저장
+    - get_or_fetch_async: 캐시에 없으면 원본을 호출하되, 같은 키의 동시 요청은 한 번만 호출
+    """
+    def __init__(self, maxsize: int = 1024, ttl: float = 300.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._async_flights: dict = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        value = self._lookup(key)
+        return default if value is _MISSING else value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
+
+    def _lookup(self, key: Hashable) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return _MISSING
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return _MISSING
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    async def get_or_fetch_async(
+        self,
+        key: Hashable,
+        fetch: Callable[[], Awaitable[Any]],
+        ttl: Optional[float] = None,
+        cacheable: Callable[[Any], bool] = lambda value: True,
+    ) -> Any:
+        """
+        캐시에 값이 없으면 fetch()를 호출해 저장합니다. fetch는 awaitable을 반환하는 함수이고,
+        cacheable이 False인 결과는 저장하지 않습니다.
+        원본 호출은 요청과 분리된 하나의 작업(task)으로 실행하므로, 한 요청이 취소되거나 시간 초과되어도
+        같은 키를 기다리는 다른 요청에는 영향을 주지 않습니다.
+        """
+        value = self._lookup(key)
+        if value is not _MISSING:
+            return value
+
+        task = self._async_flights.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            task = asyncio.ensure_future(self._fetch_and_store(key, fetch, ttl, cacheable))
+            task.add_done_callback(_retrieve_exception)
+            self._async_flights[key] = task
+        return await asyncio.shield(task)
+
+    async def _fetch_and_store(self, key, fetch, ttl, cacheable) -> Any:
+        try:
+            value = await fetch()
+            if cacheable(value):
+                self.set(key, value, ttl)
+            return value
+        finally:
+            self._async_flights.pop(key, None)
+
+
+def _retrieve_exception(task: "asyncio.Future") -> None:
+    # 기다리는 요청이 모두 취소된 뒤 실패해도 "exception was never retrieved" 경고가 나지 않도록 합니다.
+    if not task.cancelled():
+        task.exception()
+
+
+class SQLiteStore:
+    """
+    만료 시간을 가진 키-값 저장소입니다. 값은 JSON으로 직렬화하여 SQLite 파일에 저장하므로
+    서버를 다시 시작하거나 여러 워커 프로세스가 같은 파일을 사용해도 공유됩니다.
+    """
+    def __init__(self, path: str, table: str = "cache"):
+        self.path = path
+        self.table = table
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=5)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str, default: Any = None) -> Any:
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT value FROM {self.table} WHERE key = ? AND expires_at > ?", (key, time.time())
+            ).fetchone()
+        if row is None:
+            self.misses += 1
+            return default
+        self.hits += 1
+        return json.loads(row[0])
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        with self._lock:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False), time.time() + ttl),
+            )
+            self._conn.commit()
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def prune(self) -> int:
+        """만료된 항목을 삭제하고 삭제한 개수를 반환합니다."""
+        with self._lock:
+            cursor = self._conn.execute(f"DELETE FROM {self.table} WHERE expires_at <= ?", (time.time(),))
+            self._conn.commit()
+            return cursor.rowcount
+
+    def stats(self) -> dict:
+        with self._lock:
+            size = self._conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+        return {"size": size, "hits": self.hits, "misses": self.misses}
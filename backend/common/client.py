@@ -2,11 +2,16 @@
 OpenAI API 클라이언트 및 공통 유틸리티를 제공합니다.
 """
 import os
+import threading
+import time
 import pytz
 import tiktoken
-from openai import OpenAI
+from openai import AsyncOpenAI
 # from dotenv import load_dotenv  <- 이 줄 삭제
 from datetime import datetime, timedelta
+from functools import lru_cache
+from common.http_client import openai_async_http
+from common import metrics
 # from pathlib import Path <- 이 줄 삭제
 
 # --- [핵심 수정 2] .env 파일을 직접 로드하는 코드 모두 삭제 ---
@@ -19,10 +24,56 @@ OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 if not OPENAI_API_KEY:
     raise ValueError("치명적 오류: OPENAI_API_KEY가 환경 변수에 설정되지 않았습니다. main.py에서 .env 파일을 로드했는지 확인하세요.")
 
-# OpenAI 클라이언트 인스턴스
-client = OpenAI(api_key=OPENAI_API_KEY, timeout=30, max_retries=1)
+# 이벤트 루프를 막지 않는 비동기 OpenAI 클라이언트 인스턴스
+# 공용 연결 풀(common.http_client)을 사용해 요청 간 TLS 연결을 재사용합니다.
+async_client = AsyncOpenAI(api_key=OPENAI_API_KEY, timeout=30, max_retries=1, http_client=openai_async_http)
 
 # --- 이하 나머지 함수들은 그대로 유지 ---
+
+class UsageStats:
+    """
+    OpenAI 응답의 usage를 누적합니다.
+    prompt_tokens_details.cached_tokens로 프롬프트 캐시가 실제로 적용된 토큰 수를 확인할 수 있습니다.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cached_tokens = 0
+
+    def record(self, usage):
+        if not usage or "prompt_tokens" not in usage:
+            return
+        details = usage.get("prompt_tokens_details") or {}
+        with self._lock:
+            self.requests += 1
+            self.prompt_tokens += usage.get("prompt_tokens") or 0
+            self.completion_tokens += usage.get("completion_tokens") or 0
+            self.cached_tokens += details.get("cached_tokens") or 0
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "prompt_tokens": self.prompt_tokens,
+                "completion_tokens": self.completion_tokens,
+                "cached_tokens": self.cached_tokens,
+                "cached_ratio": round(self.cached_tokens / self.prompt_tokens, 4) if self.prompt_tokens else 0.0,
+            }
+
+usage_stats = UsageStats()
+
+def record_usage(usage):
+    """chat completion 응답의 usage(dict 또는 SDK 객체)를 usage_stats에 기록합니다."""
+    if usage is not None and not isinstance(usage, dict):
+        usage = usage.model_dump()
+    usage_stats.record(usage)
+    if usage and "prompt_tokens" in usage:
+        details = usage.get("prompt_tokens_details") or {}
+        metrics.record_tokens(
+            usage.get("prompt_tokens") or 0, usage.get("completion_tokens") or 0, details.get("cached_tokens") or 0
+        )
 def makeup_response(message, finish_reason="ERROR"):
     # ... (내용 동일)
     return {
@@ -30,22 +81,113 @@ def makeup_response(message, finish_reason="ERROR"):
         "usage": {"total_tokens": 0},
     }
 
-def gpt_num_tokens(messages, model="gpt-4o"):
-    # ... (내용 동일)
+class CompletionStream:
+    """
+    스트리밍 chat completion을 감싸서 토큰 조각(delta)을 순서대로 내보내고,
+    스트림이 끝나면 makeup_response와 같은 형식의 전체 응답(response)을 제공합니다.
+    모델이 함수 호출을 요청하면 조각난 tool_calls를 모아 tool_calls에 보관합니다.
+    """
+    def __init__(self, error_message="[SmartDayBot에 문제가 발생했습니다. 잠시 뒤에 다시 이용해주세요.]", **params):
+        self.params = params
+        self.error_message = error_message
+        self.parts = []
+        self.tool_calls = []
+        self.finish_reason = None
+        self.usage = {"total_tokens": 0}
+        # 스트림이 오류 없이 끝나면 전체 응답(response)을 인자로 호출됩니다.
+        self.on_complete = None
+
+    @classmethod
+    def of(cls, message, finish_reason="ERROR"):
+        """API를 호출하지 않고 고정된 메시지 하나만 내보내는 스트림을 만듭니다."""
+        stream = cls()
+        stream.params = None
+        stream.parts = [message]
+        stream.finish_reason = finish_reason
+        return stream
+
+    async def deltas(self):
+        if self.params is None:
+            yield self.content
+            return
+        # 첫 토큰까지의 시간(first_token)과 스트림 전체 시간(completion)을 기록합니다.
+        started = time.perf_counter()
+        first = True
+        try:
+            stream = await async_client.chat.completions.create(
+                **self.params, stream=True, stream_options={"include_usage": True}
+            )
+            async for chunk in stream:
+                if chunk.usage:
+                    self.usage = chunk.usage.model_dump()
+                if not chunk.choices:
+                    continue
+                choice = chunk.choices[0]
+                if choice.finish_reason:
+                    self.finish_reason = choice.finish_reason
+                for tool_call in choice.delta.tool_calls or []:
+                    self._add_tool_call_delta(tool_call)
+                if choice.delta.content:
+                    if first:
+                        metrics.observe("first_token", time.perf_counter() - started)
+                        first = False
+                    self.parts.append(choice.delta.content)
+                    yield choice.delta.content
+        except Exception as e:
+            print(f"Exception 오류({type(e)}) 발생:{e}")
+            self.parts.append(self.error_message)
+            self.finish_reason = "ERROR"
+            yield self.error_message
+        else:
+            metrics.observe("completion", time.perf_counter() - started)
+            record_usage(self.usage)
+            if self.on_complete is not None:
+                self.on_complete(self.response)
+
+    def _add_tool_call_delta(self, delta):
+        while len(self.tool_calls) <= delta.index:
+            self.tool_calls.append({"id": None, "type": "function", "function": {"name": "", "arguments": ""}})
+        tool_call = self.tool_calls[delta.index]
+        if delta.id:
+            tool_call["id"] = delta.id
+        if delta.function:
+            if delta.function.name:
+                tool_call["function"]["name"] += delta.function.name
+            if delta.function.arguments:
+                tool_call["function"]["arguments"] += delta.function.arguments
+
+    @property
+    def content(self):
+        return "".join(self.parts)
+
+    @property
+    def response(self):
+        response = makeup_response(self.content, self.finish_reason or "stop")
+        response["usage"] = self.usage
+        if self.tool_calls:
+            response["choices"][0]["message"]["tool_calls"] = self.tool_calls
+        return response
+
+@lru_cache(maxsize=None)
+def get_encoding(model="gpt-4o"):
+    """모델에 맞는 tiktoken 인코더를 한 번만 만들어 재사용합니다."""
     try:
-        encoding = tiktoken.encoding_for_model(model)
+        return tiktoken.encoding_for_model(model)
     except KeyError:
-        encoding = tiktoken.get_encoding("cl100k_base")
-        
-    tokens_per_message = 3
-    num_tokens = 0
-    for message in messages:
-        num_tokens += tokens_per_message
+        return tiktoken.get_encoding("cl100k_base")
+
+def text_num_tokens(text, model="gpt-4o"):
+    """문자열 하나의 토큰 수를 계산합니다."""
+    return len(get_encoding(model).encode(text))
+
+def message_num_tokens(message, model="gpt-4o"):
+    """메시지 하나의 토큰 수(메시지 오버헤드 3토큰 포함)를 계산합니다."""
+    with metrics.span("tokens"):
+        num_tokens = 3
         for _, value in message.items():
             if value:
-                num_tokens += len(encoding.encode(str(value)))
-    num_tokens += 3
-    return num_tokens
+                num_tokens += text_num_tokens(str(value), model)
+        return num_tokens
 
 def today():
     # ... (내용 동일)
@@ -0,0 +1,184 @@
+"""
+외부 API 호출에 공통으로 사용하는 HTTP 클라이언트 계층을 제공합니다.
+연결 재사용(keep-alive), 연결 수 제한, 호스트별 타임아웃, 지수 백오프 재시도를 적용하고
+호스트별 요청 통계를 수집합니다.
+"""
+import asyncio
+import threading
+import time
+from collections import defaultdict
+from urllib.parse import urlsplit
+
+import httpx
+
+from config import (
+    HTTP_DEFAULT_TIMEOUT_SECONDS,
+    HTTP_HOST_RETRIES,
+    HTTP_HOST_TIMEOUTS,
+    HTTP_MAX_CONNECTIONS,
+    HTTP_MAX_KEEPALIVE_CONNECTIONS,
+    HTTP_MAX_RETRIES,
+    HTTP_RETRY_BACKOFF_SECONDS,
+    HTTP_RETRY_BUDGET_SECONDS,
+)
+
+# 재시도할 응답 상태 코드
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+# 같은 요청을 다시 보내도 결과가 같은 메서드. 그 외(POST 등)는 요청이 서버에 전달되지 않은 연결 오류만 재시도합니다.
+# (검색 API처럼 호출마다 과금되는 POST 요청이 읽기 타임아웃 후 중복 전송되지 않도록 합니다.)
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+CONNECT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+
+class PoolMetrics:
+    """호스트별 요청 수, 진행 중인 요청 수, 재시도 수, 오류 수, 누적 응답 시간을 기록합니다."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hosts = defaultdict(lambda: {"requests": 0, "in_flight": 0, "retries": 0, "errors": 0, "seconds": 0.0})
+
+    def start(self, host):
+        with self._lock:
+            self.hosts[host]["requests"] += 1
+            self.hosts[host]["in_flight"] += 1
+
+    def finish(self, host, started, error=False):
+        with self._lock:
+            stats = self.hosts[host]
+            stats["in_flight"] -= 1
+            stats["seconds"] += time.perf_counter() - started
+            if error:
+                stats["errors"] += 1
+
+    def retry(self, host, count=1):
+        with self._lock:
+            self.hosts[host]["retries"] += count
+
+    def snapshot(self):
+        with self._lock:
+            return {host: dict(stats, seconds=round(stats["seconds"], 3)) for host, stats in self.hosts.items()}
+
+
+metrics = PoolMetrics()
+
+
+def _host(url):
+    return urlsplit(str(url)).hostname or ""
+
+
+def timeout_for(url):
+    """URL의 호스트에 맞는 타임아웃(초)을 반환합니다."""
+    return HTTP_HOST_TIMEOUTS.get(_host(url), HTTP_DEFAULT_TIMEOUT_SECONDS)
+
+
+def retries_for(url):
+    """URL의 호스트에 맞는 최대 재시도 횟수를 반환합니다."""
+    return HTTP_HOST_RETRIES.get(_host(url), HTTP_MAX_RETRIES)
+
+
+def _backoff(attempt):
+    return HTTP_RETRY_BACKOFF_SECONDS * (2 ** attempt)
+
+
+# --- 비동기 클라이언트: 애플리케이션 전체에서 연결을 재사용하는 httpx 클라이언트 ---
+_limits = httpx.Limits(
+    max_connections=HTTP_MAX_CONNECTIONS,
+    max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+)
+async_http = httpx.AsyncClient(limits=_limits, timeout=HTTP_DEFAULT_TIMEOUT_SECONDS)
+
+
+def _can_retry(attempt, max_retries, timeout, deadline):
+    """남은 재시도가 있고, 백오프 후 한 번 더 시도해도 예산 안에 끝날 수 있을 때만 True입니다."""
+    return attempt < max_retries and time.perf_counter() + _backoff(attempt) + timeout <= deadline
+
+
+async def arequest(method, url, **kwargs):
+    """
+    공유 비동기 클라이언트로 요청을 보냅니다.
+    연결 오류나 RETRY_STATUSES 응답은 지수 백오프로 호스트별 최대 횟수까지 재시도합니다.
+    멱등이 아닌 메서드(POST 등)는 연결 오류만 재시도하고, 다음 시도가 HTTP_RETRY_BUDGET_SECONDS 안에
+    끝날 수 없으면 재시도하지 않습니다.
+    """
+    host = _host(url)
+    kwargs.setdefault("timeout", timeout_for(url))
+    timeout = kwargs["timeout"] if isinstance(kwargs["timeout"], (int, float)) else HTTP_DEFAULT_TIMEOUT_SECONDS
+    max_retries = retries_for(url)
+    idempotent = method.upper() in IDEMPOTENT_METHODS
+    started = time.perf_counter()
+    deadline = started + HTTP_RETRY_BUDGET_SECONDS
+    metrics.start(host)
+    error = True
+    try:
+        for attempt in range(max_retries + 1):
+            try:
+                response = await async_http.request(method, url, **kwargs)
+            except CONNECT_ERRORS:
+                if not _can_retry(attempt, max_retries, timeout, deadline):
+                    raise
+            except httpx.TransportError:
+                if not idempotent or not _can_retry(attempt, max_retries, timeout, deadline):
+                    raise
+            else:
+                if response.status_code not in RETRY_STATUSES or not idempotent or not _can_retry(attempt, max_retries, timeout, deadline):
+                    error = response.status_code >= 400
+                    return response
+            metrics.retry(host)
+            await asyncio.sleep(_backoff(attempt))
+    finally:
+        metrics.finish(host, started, error)
+
+
+async def aget(url, **kwargs):
+    return await arequest("GET", url, **kwargs)
+
+
+async def apost(url, **kwargs):
+    return await arequest("POST", url, **kwargs)
+
+
+# --- OpenAI SDK용 클라이언트: 같은 연결 제한을 적용하고 요청 통계를 수집합니다 ---
+async def _on_openai_request(request):
+    request.extensions["started"] = time.perf_counter()
+    metrics.start(request.url.host)
+
+
+async def _on_openai_response(response):
+    request = response.request
+    metrics.finish(request.url.host, request.extensions.get("started", time.perf_counter()), response.status_code >= 400)
+
+
+openai_async_http = httpx.AsyncClient(
+    limits=_limits,
+    timeout=HTTP_HOST_TIMEOUTS.get("api.openai.com", HTTP_DEFAULT_TIMEOUT_SECONDS),
+    event_hooks={"request": [_on_openai_request], "response": [_on_openai_response]},
+)
+
+
+def _open_connections(client):
+    """httpx 클라이언트의 현재 연결 수를 반환합니다. 내부 구조를 확인할 수 없으면 None을 반환합니다."""
+    try:
+        return len(client._transport._pool.connections)
+    except AttributeError:
+        return None
+
+
+def pool_stats():
+    """연결 풀 설정과 호스트별 요청 통계를 반환합니다."""
+    return {
+        "limits": {
+            "max_connections": HTTP_MAX_CONNECTIONS,
+            "max_keepalive_connections": HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            "max_retries": HTTP_MAX_RETRIES,
+        },
+        "open_connections": {
+            "async": _open_connections(async_http),
+            "openai_async": _open_connections(openai_async_http),
+        },
+        "hosts": metrics.snapshot(),
+    }
+
+
+async def aclose():
+    """애플리케이션 종료 시 열린 연결을 정리합니다."""
+    await async_http.aclose()
+    await openai_async_http.aclose()
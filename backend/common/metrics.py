@@ -0,0 +1,152 @@
+"""
+요청 처리 단계별 소요 시간과 토큰 사용량을 수집합니다.
+- span(name): 단계 하나의 소요 시간을 측정하여 Prometheus 히스토그램과 현재 요청의 기록에 함께 남깁니다.
+- render(): /metrics에서 내보낼 Prometheus 텍스트 형식을 만듭니다.
+- RequestTimings.server_timing(): 응답의 Server-Timing 헤더 값을 만듭니다.
+"""
+import contextvars
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Dict, Optional, Tuple
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+TOKEN_BUCKETS = (100, 250, 500, 1000, 2000, 4000, 8000, 16000, 32000)
+
+
+def _label_text(labelnames: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(labelnames, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values: Dict[tuple, float] = defaultdict(float)
+        self._lock = threading.Lock()
+
+    def inc(self, value: float = 1, **labels) -> None:
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            self._values[key] += value
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_label_text(self.labelnames, key)} {value}")
+        return "\n".join(lines)
+
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = tuple(buckets)
+        # 레이블 값 -> [버킷별 개수..., 합계, 전체 개수]
+        self._values: Dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [0] * len(self.buckets) + [0.0, 0]
+            for idx, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[idx] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, state in sorted(self._values.items()):
+                for bound, count in zip(self.buckets, state):
+                    labels = _label_text(self.labelnames, key, 'le="%s"' % bound)
+                    lines.append(f"{self.name}_bucket{labels} {count}")
+                labels = _label_text(self.labelnames, key, 'le="+Inf"')
+                lines.append(f"{self.name}_bucket{labels} {state[-1]}")
+                lines.append(f"{self.name}_sum{_label_text(self.labelnames, key)} {state[-2]}")
+                lines.append(f"{self.name}_count{_label_text(self.labelnames, key)} {state[-1]}")
+        return "\n".join(lines)
+
+
+STAGE_SECONDS = Histogram("smartday_stage_seconds", "Time spent in each chat pipeline stage.", ("stage",))
+HTTP_REQUEST_SECONDS = Histogram(
+    "smartday_http_request_seconds", "HTTP request latency.", ("method", "route", "status")
+)
+OPENAI_TOKENS = Counter("smartday_openai_tokens_total", "OpenAI tokens used.", ("kind",))
+REQUEST_TOKENS = Histogram(
+    "smartday_request_tokens", "OpenAI tokens used per HTTP request.", ("kind",), buckets=TOKEN_BUCKETS
+)
+_registry = (STAGE_SECONDS, HTTP_REQUEST_SECONDS, OPENAI_TOKENS, REQUEST_TOKENS)
+
+
+class RequestTimings:
+    """요청 하나에서 측정한 단계별 누적 시간(초)과 토큰 사용량입니다."""
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages: Dict[str, float] = defaultdict(float)
+        self.tokens: Dict[str, int] = defaultdict(int)
+
+    def server_timing(self) -> str:
+        """Server-Timing 헤더 값을 만듭니다. 시간은 밀리초 단위입니다."""
+        entries = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in self.stages.items()]
+        if self.tokens:
+            usage = " ".join(f"{kind}={count}" for kind, count in self.tokens.items())
+            entries.append(f'tokens;desc="{usage}"')
+        entries.append(f"total;dur={(time.perf_counter() - self.started) * 1000:.1f}")
+        return ", ".join(entries)
+
+
+_current: contextvars.ContextVar[Optional[RequestTimings]] = contextvars.ContextVar("request_timings", default=None)
+
+
+def start_request() -> RequestTimings:
+    """현재 요청(컨텍스트)의 측정을 시작합니다. 이 요청에서 만든 작업(task)도 같은 기록을 공유합니다."""
+    timings = RequestTimings()
+    _current.set(timings)
+    return timings
+
+
+def observe(stage: str, seconds: float) -> None:
+    STAGE_SECONDS.observe(seconds, stage=stage)
+    timings = _current.get()
+    if timings is not None:
+        timings.stages[stage] += seconds
+
+
+@contextmanager
+def span(stage: str):
+    """with 블록의 소요 시간을 stage 이름으로 기록합니다."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(stage, time.perf_counter() - started)
+
+
+def record_tokens(prompt: int, completion: int, cached: int) -> None:
+    timings = _current.get()
+    for kind, count in (("prompt", prompt), ("completion", completion), ("cached", cached)):
+        OPENAI_TOKENS.inc(count, kind=kind)
+        if timings is not None:
+            timings.tokens[kind] += count
+
+
+def finish_request(timings: RequestTimings, method: str, route: str, status: int) -> None:
+    HTTP_REQUEST_SECONDS.observe(time.perf_counter() - timings.started, method=method, route=route, status=status)
+    for kind, count in timings.tokens.items():
+        REQUEST_TOKENS.observe(count, kind=kind)
+
+
+def render() -> str:
+    return "\n".join(metric.render() for metric in _registry) + "\n"
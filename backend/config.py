@@ -18,4 +18,81 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 60
 
 # 외부 API 키
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-TAVILY_API_KEY = os.getenv("TAVILY_API_KEY") 
\ No newline at end of file
+TAVILY_API_KEY = os.getenv("TAVILY_API_KEY") 
+
+# 챗봇 세션 설정
+CHAT_SESSION_TTL_SECONDS = int(os.getenv("CHAT_SESSION_TTL_SECONDS", 30 * 60))
+CHAT_SESSION_MAX_SESSIONS = int(os.getenv("CHAT_SESSION_MAX_SESSIONS", 1000))
+CHAT_SESSION_MAX_MESSAGES = int(os.getenv("CHAT_SESSION_MAX_MESSAGES", 40))
+CHAT_SESSION_MAX_TOTAL_CHARS = int(os.getenv("CHAT_SESSION_MAX_TOTAL_CHARS", 20_000_000))
+
+# 챗봇 답변 설정
+# true이면 답변 요청에 tools를 함께 보내 함수 호출 판단(analyze)을 위한 별도 요청을 생략합니다.
+CHAT_SINGLE_CALL = os.getenv("CHAT_SINGLE_CALL", "true").lower() == "true"
+# 한 번의 함수 호출 라운드에서 각 함수의 최대 실행 시간(초)과 최대 함수 호출 라운드 수
+TOOL_TIMEOUT_SECONDS = float(os.getenv("TOOL_TIMEOUT_SECONDS", 10))
+MAX_TOOL_ROUNDS = int(os.getenv("MAX_TOOL_ROUNDS", 3))
+
+# 날씨 조회 캐시 유지 시간(초): 현재 날씨 / 날짜별 예보
+WEATHER_CURRENT_TTL_SECONDS = int(os.getenv("WEATHER_CURRENT_TTL_SECONDS", 10 * 60))
+WEATHER_FORECAST_TTL_SECONDS = int(os.getenv("WEATHER_FORECAST_TTL_SECONDS", 60 * 60))
+# 한 번에 받아 두는 예보 기간(일). 이 기간 안의 날짜는 추가 호출 없이 응답합니다.
+WEATHER_FORECAST_DAYS = int(os.getenv("WEATHER_FORECAST_DAYS", 16))
+# 모든 주요 지역의 날씨를 미리 받아 두는 백그라운드 갱신 주기(초)
+WEATHER_PREFETCH_ENABLED = os.getenv("WEATHER_PREFETCH_ENABLED", "true").lower() == "true"
+WEATHER_PREFETCH_INTERVAL_SECONDS = int(os.getenv("WEATHER_PREFETCH_INTERVAL_SECONDS", 10 * 60))
+
+# 외부 API 공용 HTTP 연결 풀 설정
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", 100))
+HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", 20))
+HTTP_MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", 2))
+HTTP_RETRY_BACKOFF_SECONDS = float(os.getenv("HTTP_RETRY_BACKOFF_SECONDS", 0.3))
+HTTP_DEFAULT_TIMEOUT_SECONDS = float(os.getenv("HTTP_DEFAULT_TIMEOUT_SECONDS", 10))
+# 호스트별 시도 1회의 타임아웃(초). 함수 호출 도구로 쓰이는 호스트는 (타임아웃 x 시도 횟수 + 백오프)가
+# TOOL_TIMEOUT_SECONDS 안에 들어오도록 정합니다. (open-meteo: 2.5 x 3 + 0.9 = 8.4초, tavily: 8초 x 1회)
+HTTP_HOST_TIMEOUTS = {
+    "api.open-meteo.com": 2.5,
+    "api.tavily.com": 8.0,
+    "api.openai.com": 30.0,
+}
+# 호스트별 최대 재시도 횟수 (지정하지 않은 호스트는 HTTP_MAX_RETRIES)
+HTTP_HOST_RETRIES = {
+    "api.tavily.com": 0,
+}
+# 비동기 요청의 재시도를 포함한 전체 시간 예산(초). 다음 시도가 예산 안에 끝날 수 없으면 재시도하지 않습니다.
+HTTP_RETRY_BUDGET_SECONDS = float(os.getenv("HTTP_RETRY_BUDGET_SECONDS", TOOL_TIMEOUT_SECONDS))
+
+# 인터넷 검색 결과 캐시 설정. SEARCH_CACHE_DB_PATH를 지정하면 SQLite 파일에도 저장하여 재시작 후에도 유지합니다.
+SEARCH_CACHE_TTL_SECONDS = int(os.getenv("SEARCH_CACHE_TTL_SECONDS", 6 * 60 * 60))
+SEARCH_CACHE_MAXSIZE = int(os.getenv("SEARCH_CACHE_MAXSIZE", 1000))
+SEARCH_CACHE_DB_PATH = os.getenv("SEARCH_CACHE_DB_PATH", "")
+
+# 챗봇 답변 캐시 설정. 답변에 반영된 날씨 정보보다 오래 남지 않도록 기본 유지 시간은 현재 날씨 캐시와 같게 둡니다.
+CHAT_RESPONSE_CACHE_ENABLED = os.getenv("CHAT_RESPONSE_CACHE_ENABLED", "true").lower() == "true"
+CHAT_RESPONSE_CACHE_TTL_SECONDS = int(os.getenv("CHAT_RESPONSE_CACHE_TTL_SECONDS", WEATHER_CURRENT_TTL_SECONDS))
+CHAT_RESPONSE_CACHE_MAXSIZE = int(os.getenv("CHAT_RESPONSE_CACHE_MAXSIZE", 2000))
+# 캐시 키에 포함할 직전 대화 메시지 수
+CHAT_RESPONSE_CACHE_CONTEXT_MESSAGES = int(os.getenv("CHAT_RESPONSE_CACHE_CONTEXT_MESSAGES", 4))
+
+# 대화 컨텍스트 압축 설정. 요청 토큰 수가 예산을 넘으면 오래된 대화를 요약으로 옮기고 최근 메시지만 그대로 남깁니다.
+CHAT_CONTEXT_TOKEN_BUDGET = int(os.getenv("CHAT_CONTEXT_TOKEN_BUDGET", 6000))
+# 압축 후 목표 토큰 수(예산 대비 비율)와 요약하지 않고 남길 최근 메시지 수
+CHAT_COMPACT_TARGET_RATIO = float(os.getenv("CHAT_COMPACT_TARGET_RATIO", 0.6))
+CHAT_COMPACT_KEEP_MESSAGES = int(os.getenv("CHAT_COMPACT_KEEP_MESSAGES", 6))
+CHAT_SUMMARY_MAX_TOKENS = int(os.getenv("CHAT_SUMMARY_MAX_TOKENS", 300))
+CHAT_SUMMARY_MAX_CHARS = int(os.getenv("CHAT_SUMMARY_MAX_CHARS", 2000))
+
+# 비밀번호 해시(bcrypt) 설정: cost(rounds), 전용 프로세스 풀 크기, 최대 대기 작업 수(넘으면 429 응답)
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", 12))
+BCRYPT_POOL_WORKERS = int(os.getenv("BCRYPT_POOL_WORKERS", 2))
+BCRYPT_MAX_PENDING = int(os.getenv("BCRYPT_MAX_PENDING", 32))
+
+# JWT 검증 결과 캐시 크기와 토큰 블랙리스트 저장 위치. TOKEN_BLACKLIST_DB_PATH를 지정하면 SQLite 파일로 여러 워커가 공유합니다.
+TOKEN_CACHE_MAXSIZE = int(os.getenv("TOKEN_CACHE_MAXSIZE", 10000))
+TOKEN_BLACKLIST_DB_PATH = os.getenv("TOKEN_BLACKLIST_DB_PATH", "")
+# 현재 사용자 정보 캐시 (uid가 없는 토큰이나 전체 사용자 정보가 필요한 경우에 사용)
+USER_CACHE_TTL_SECONDS = int(os.getenv("USER_CACHE_TTL_SECONDS", 60))
+USER_CACHE_MAXSIZE = int(os.getenv("USER_CACHE_MAXSIZE", 10000))
+
+# 일정 일괄 생성/수정/삭제 API에서 한 번에 처리할 수 있는 최대 일정 수
+CALENDAR_BULK_MAX_EVENTS = int(os.getenv("CALENDAR_BULK_MAX_EVENTS", 200))
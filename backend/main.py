@@ -5,7 +5,7 @@ FastAPI 애플리케이션의 메인 진입점입니다.
 from fastapi import FastAPI, Request
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv # .env 파일을 읽기 위해 추가
 
@@ -13,9 +13,33 @@ from dotenv import load_dotenv # .env 파일을 읽기 위해 추가
 # main.py에서 단 한번만 실행하여 모든 환경 변수를 로드합니다.
 load_dotenv()
 
-from routers import user_router, preference_router, calendar_router, chatbot_router, map_router
-
-app = FastAPI(title="FastAPI Refactor Project")
+import asyncio
+from contextlib import asynccontextmanager
+from routers import user_router, preference_router, calendar_router, chatbot_router, map_router, stats_router
+from services import map_service, weather_service
+from common import http_client, metrics
+from utils import security
+from config import WEATHER_PREFETCH_ENABLED
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # 지도 위치 데이터를 요청 전에 미리 메모리에 적재합니다.
+    map_service.preload()
+    # 비밀번호 해시용 프로세스 풀은 요청을 처리하기 전에 만들어 둡니다.
+    security.start_pool()
+    # 주요 지역의 날씨를 백그라운드에서 주기적으로 미리 받아 둡니다.
+    prefetcher = asyncio.create_task(weather_service.run_prefetcher()) if WEATHER_PREFETCH_ENABLED else None
+    yield
+    if prefetcher is not None:
+        prefetcher.cancel()
+    # 외부 API 연결을 정리합니다.
+    await http_client.aclose()
+    # 비밀번호 해시용 프로세스 풀을 정리합니다.
+    security.shutdown_pool()
+
+
+app = FastAPI(title="FastAPI Refactor Project", lifespan=lifespan)
 
 origins = [
     "http://127.0.0.1:5500",
@@ -32,6 +56,17 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# 요청별 단계 소요 시간(Server-Timing 헤더)과 Prometheus 지표를 수집합니다.
+# 스트리밍 응답은 헤더가 먼저 전송되므로 헤더에는 첫 응답 전까지의 단계만 포함되고, 전체 단계는 /metrics에 기록됩니다.
+@app.middleware("http")
+async def timing_middleware(request: Request, call_next):
+    timings = metrics.start_request()
+    response = await call_next(request)
+    response.headers["Server-Timing"] = timings.server_timing()
+    route = request.scope.get("route")
+    metrics.finish_request(timings, request.method, getattr(route, "path", "unmatched"), response.status_code)
+    return response
+
 app.mount("/static", StaticFiles(directory="static"), name="static")
 templates = Jinja2Templates(directory="templates")
 
@@ -41,12 +76,17 @@ app.include_router(preference_router.router, prefix="/preferences", tags=["Prefe
 app.include_router(calendar_router.router, prefix="/calendar", tags=["Calendar"])
 app.include_router(chatbot_router.router, prefix="/chatbot", tags=["Chatbot"])
 app.include_router(map_router.router, prefix="/map", tags=["Map"])
+app.include_router(stats_router.router, prefix="/stats", tags=["Stats"])
 
 
 @app.get("/", tags=["Root"])
 def root():
     return {"message": "Smart Day API"}
 
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def prometheus_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
 @app.get("/login", response_class=HTMLResponse)
 async def serve_login_page(request: Request):
     return templates.TemplateResponse("login01.html", {"request": request})
@@ -0,0 +1,92 @@
+"""
+calendar_events.date 컬럼을 문자열(VARCHAR(10))에서 DATE로 바꾸고 (user_id, date) 복합 인덱스를 추가합니다.
+backend 디렉터리에서 실행합니다: python -m migrations.calendar_date [--dry-run]
+이미 적용된 단계는 건너뛰므로 여러 번 실행해도 됩니다.
+"""
+import argparse
+from datetime import datetime
+
+from sqlalchemy import Date, inspect, text
+
+from database import engine
+
+TABLE = "calendar_events"
+INDEX = "ix_calendar_events_user_date"
+# 기존 데이터에 섞여 있을 수 있는 날짜 형식
+DATE_FORMATS = ("%Y-%m-%d", "%Y.%m.%d", "%Y/%m/%d", "%Y%m%d")
+
+
+def _parse(value):
+    value = (value or "").strip()
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def normalize_rows(conn, dry_run: bool):
+    """
+    기존 문자열 값을 'YYYY-MM-DD'로 맞춰 DATE로 변환할 수 있게 합니다.
+    (전체 행 수, 고칠 행 목록, 해석할 수 없는 행 목록)을 반환합니다.
+    """
+    rows = conn.execute(text(f"SELECT id, date FROM {TABLE}")).fetchall()
+    updates, invalid = [], []
+    for event_id, value in rows:
+        day = _parse(value)
+        if day is None:
+            invalid.append((event_id, value))
+        elif day.isoformat() != value:
+            updates.append({"id": event_id, "date": day.isoformat()})
+    # 해석할 수 없는 값이 있으면 아무것도 고치지 않습니다.
+    if updates and not invalid and not dry_run:
+        conn.execute(text(f"UPDATE {TABLE} SET date = :date WHERE id = :id"), updates)
+    return len(rows), updates, invalid
+
+
+def _alter_statement(dialect: str):
+    if dialect == "mysql":
+        return f"ALTER TABLE {TABLE} MODIFY date DATE NOT NULL"
+    if dialect == "postgresql":
+        return f"ALTER TABLE {TABLE} ALTER COLUMN date TYPE DATE USING date::date"
+    return None
+
+
+def migrate(dry_run: bool = False) -> bool:
+    inspector = inspect(engine)
+    column = next(c for c in inspector.get_columns(TABLE) if c["name"] == "date")
+    has_index = any(index["name"] == INDEX for index in inspector.get_indexes(TABLE))
+
+    with engine.begin() as conn:
+        if isinstance(column["type"], Date):
+            print("date 컬럼은 이미 DATE 타입입니다.")
+        else:
+            statement = _alter_statement(engine.dialect.name)
+            if statement is None:
+                print(f"지원하지 않는 데이터베이스입니다: {engine.dialect.name}")
+                return False
+            total, updates, invalid = normalize_rows(conn, dry_run)
+            print(f"전체 {total}건 중 형식 변환 {len(updates)}건, 변환 불가 {len(invalid)}건")
+            if invalid:
+                for event_id, value in invalid:
+                    print(f"  id={event_id} date={value!r}")
+                print("변환할 수 없는 날짜를 먼저 수정한 뒤 다시 실행해주세요.")
+                return False
+            if not dry_run:
+                conn.execute(text(statement))
+                print("date 컬럼을 DATE 타입으로 변경했습니다.")
+
+        if has_index:
+            print(f"{INDEX} 인덱스가 이미 있습니다.")
+        elif not dry_run:
+            conn.execute(text(f"CREATE INDEX {INDEX} ON {TABLE} (user_id, date)"))
+            print(f"{INDEX} 인덱스를 추가했습니다.")
+    return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--dry-run", action="store_true", help="변경하지 않고 변환 결과만 확인합니다.")
+    args = parser.parse_args()
+    raise SystemExit(0 if migrate(args.dry_run) else 1)
@@ -1,15 +1,18 @@
 """
 CalendarEvent 테이블에 대한 SQLAlchemy 모델을 정의합니다.
 """
-from sqlalchemy import Column, Integer, String, ForeignKey
+from sqlalchemy import Column, Integer, String, Date, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from database import Base
 
 class CalendarEvent(Base):
     __tablename__ = "calendar_events"
+    # 사용자별 날짜/기간 조회를 인덱스 범위 검색으로 처리합니다.
+    __table_args__ = (Index("ix_calendar_events_user_date", "user_id", "date"),)
+
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"))
-    date = Column(String(10), nullable=False)  # YYYY-MM-DD
+    date = Column(Date, nullable=False)
     title = Column(String(255), nullable=False)
     
     user = relationship("User", back_populates="events")
@@ -1,45 +1,151 @@
+import datetime
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import bindparam, delete, insert, select, text, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from typing import List
+from config import CALENDAR_BULK_MAX_EVENTS
 from database import get_db
-from models.user import User
 from models.calendar import CalendarEvent
-from schemas.calendar import CalendarEventCreate, CalendarEventResponse
-from utils.auth import verify_token
+from schemas.calendar import CalendarEventCreate, CalendarEventResponse, CalendarEventUpdate, CalendarBulkDelete
+from utils.auth import get_current_user_id
 
 router = APIRouter()
 
+# 사용자 id는 토큰의 claims에서 가져오므로 각 요청은 일정 테이블만 조회합니다.
+
 
 @router.post("/", response_model=CalendarEventResponse)
-def create_event(event: CalendarEventCreate, token_data: dict = Depends(verify_token), db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.email == token_data["sub"]).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="사용자를 찾을 수 없습니다.")
-    new_event = CalendarEvent(user_id=user.id, date=event.date, title=event.title)
+def create_event(event: CalendarEventCreate, user_id: int = Depends(get_current_user_id), db: Session = Depends(get_db)):
+    new_event = CalendarEvent(user_id=user_id, date=event.date, title=event.title)
     db.add(new_event)
-    db.commit()
+    try:
+        db.commit()
+    except IntegrityError:
+        # 토큰 발급 후 탈퇴한 사용자이면 외래 키 제약에 걸립니다.
+        db.rollback()
+        raise HTTPException(status_code=404, detail="사용자를 찾을 수 없습니다.")
     db.refresh(new_event)
     return new_event
 
 
+def _events_between(db: Session, user_id: int, start: datetime.date, end: datetime.date):
+    """start <= date < end 인 일정을 (user_id, date) 인덱스 범위 검색으로 조회합니다."""
+    return (
+        db.query(CalendarEvent)
+        .filter(CalendarEvent.user_id == user_id, CalendarEvent.date >= start, CalendarEvent.date < end)
+        .order_by(CalendarEvent.date, CalendarEvent.id)
+        .all()
+    )
+
+
+def _month_range(month: str):
+    """'YYYY-MM'을 (그 달 1일, 다음 달 1일)로 변환합니다."""
+    try:
+        start = datetime.datetime.strptime(month, "%Y-%m").date()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="월 형식이 올바르지 않습니다. (YYYY-MM)")
+    end = datetime.date(start.year + 1, 1, 1) if start.month == 12 else datetime.date(start.year, start.month + 1, 1)
+    return start, end
+
+
 @router.get("/", response_model=List[CalendarEventResponse])
-def get_events(date: str, token_data: dict = Depends(verify_token), db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.email == token_data["sub"]).first()
-    return db.query(CalendarEvent).filter(CalendarEvent.user_id == user.id, CalendarEvent.date == date).all()
+def get_events(date: datetime.date, user_id: int = Depends(get_current_user_id), db: Session = Depends(get_db)):
+    return db.query(CalendarEvent).filter(CalendarEvent.user_id == user_id, CalendarEvent.date == date).all()
 
 
 @router.get("/monthly/", response_model=List[CalendarEventResponse])
-def get_monthly_events(month: str, token_data: dict = Depends(verify_token), db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.email == token_data["sub"]).first()
-    return db.query(CalendarEvent).filter(CalendarEvent.user_id == user.id, CalendarEvent.date.like(f"{month}-%")).all()
+def get_monthly_events(month: str, user_id: int = Depends(get_current_user_id), db: Session = Depends(get_db)):
+    return _events_between(db, user_id, *_month_range(month))
+
+
+@router.get("/range", response_model=List[CalendarEventResponse])
+def get_range_events(
+    start: datetime.date, end: datetime.date,
+    user_id: int = Depends(get_current_user_id), db: Session = Depends(get_db),
+):
+    """start부터 end까지(end 포함)의 일정을 날짜순으로 반환합니다."""
+    if end < start:
+        raise HTTPException(status_code=400, detail="종료일이 시작일보다 빠릅니다.")
+    return _events_between(db, user_id, start, end + datetime.timedelta(days=1))
 
 
 @router.delete("/{event_id}")
-def delete_event(event_id: int, token_data: dict = Depends(verify_token), db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.email == token_data["sub"]).first()
-    event = db.query(CalendarEvent).filter(CalendarEvent.id == event_id, CalendarEvent.user_id == user.id).first()
+def delete_event(event_id: int, user_id: int = Depends(get_current_user_id), db: Session = Depends(get_db)):
+    event = db.query(CalendarEvent).filter(CalendarEvent.id == event_id, CalendarEvent.user_id == user_id).first()
     if not event:
         raise HTTPException(status_code=404, detail="일정을 찾을 수 없습니다.")
     db.delete(event)
     db.commit()
     return {"message": "일정이 삭제되었습니다."}
+
+
+# --- 여러 일정을 한 번에 처리하는 API ---
+# 추천 일정처럼 여러 건을 저장할 때 건마다 요청/commit/refresh를 반복하지 않도록, 한 트랜잭션에서 한 번에 처리합니다.
+def _check_bulk_size(count: int):
+    if count > CALENDAR_BULK_MAX_EVENTS:
+        raise HTTPException(status_code=400, detail=f"한 번에 최대 {CALENDAR_BULK_MAX_EVENTS}개의 일정만 처리할 수 있습니다.")
+
+
+def _insert_events(db: Session, rows: List[dict]) -> List[int]:
+    """여러 행을 하나의 INSERT 문으로 저장하고, 입력 순서대로 생성된 id를 반환합니다."""
+    table = CalendarEvent.__table__
+    if db.get_bind().dialect.insert_executemany_returning:
+        # SQLAlchemy가 여러 행을 INSERT ... VALUES (...), (...) RETURNING 문으로 묶어 실행합니다.
+        result = db.execute(insert(table).returning(table.c.id, sort_by_parameter_order=True), rows)
+        return list(result.scalars())
+    # MySQL은 RETURNING이 없으므로 첫 번째 행의 id(LAST_INSERT_ID)에서 계산합니다.
+    # InnoDB는 행 수가 정해진 단일 INSERT 문의 행에 auto_increment_increment 간격으로 id를 할당합니다.
+    # (Galera, 다중 primary 복제 등에서는 간격이 1보다 클 수 있습니다.)
+    result = db.execute(insert(table).values(rows))
+    step = db.execute(text("SELECT @@auto_increment_increment")).scalar() or 1
+    return [result.lastrowid + i * step for i in range(len(rows))]
+
+
+@router.post("/bulk", response_model=List[CalendarEventResponse])
+def create_events(events: List[CalendarEventCreate], user_id: int = Depends(get_current_user_id), db: Session = Depends(get_db)):
+    _check_bulk_size(len(events))
+    if not events:
+        return []
+    rows = [{"user_id": user_id, "date": event.date, "title": event.title} for event in events]
+    try:
+        ids = _insert_events(db, rows)
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=404, detail="사용자를 찾을 수 없습니다.")
+    return [{"id": event_id, "date": event.date, "title": event.title} for event_id, event in zip(ids, events)]
+
+
+@router.put("/bulk", response_model=List[CalendarEventResponse])
+def update_events(events: List[CalendarEventUpdate], user_id: int = Depends(get_current_user_id), db: Session = Depends(get_db)):
+    _check_bulk_size(len(events))
+    ids = [event.id for event in events]
+    if len(set(ids)) != len(ids):
+        raise HTTPException(status_code=400, detail="같은 일정이 여러 번 포함되어 있습니다.")
+    if not events:
+        return []
+    # 다른 사용자의 일정이나 없는 일정이 섞여 있으면 아무것도 수정하지 않습니다.
+    owned = set(db.scalars(select(CalendarEvent.id).where(CalendarEvent.user_id == user_id, CalendarEvent.id.in_(ids))))
+    if len(owned) != len(ids):
+        raise HTTPException(status_code=404, detail="일정을 찾을 수 없습니다.")
+    table = CalendarEvent.__table__
+    statement = (
+        update(table)
+        .where(table.c.id == bindparam("event_id"), table.c.user_id == user_id)
+        .values(date=bindparam("new_date"), title=bindparam("new_title"))
+    )
+    db.execute(statement, [{"event_id": e.id, "new_date": e.date, "new_title": e.title} for e in events])
+    db.commit()
+    return [{"id": event.id, "date": event.date, "title": event.title} for event in events]
+
+
+@router.post("/bulk/delete")
+def delete_events(request: CalendarBulkDelete, user_id: int = Depends(get_current_user_id), db: Session = Depends(get_db)):
+    _check_bulk_size(len(request.ids))
+    if not request.ids:
+        return {"message": "삭제할 일정이 없습니다.", "deleted": 0}
+    table = CalendarEvent.__table__
+    result = db.execute(delete(table).where(table.c.user_id == user_id, table.c.id.in_(request.ids)))
+    db.commit()
+    return {"message": f"{result.rowcount}개의 일정이 삭제되었습니다.", "deleted": result.rowcount}
@@ -1,24 +1,31 @@
 """
 챗봇 UI 페이지 및 채팅 API 라우터를 정의합니다.
 """
-import re
+import asyncio
+import json
 from fastapi import APIRouter, Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 # Pydantic 모델과 타입 힌트를 위해 추가
 from pydantic import BaseModel
 from typing import Optional
 
 from common import model
 from services.chatbot_service import Chatbot, system_role, instruction
-from services.function_calling import FunctionCalling, tools
-from constants.constants import seoul_keywords, gyeonggi_keywords, global_lat_lon
-from utils.date_parser import parse_natural_date
+from services.chat_session import ChatSessionManager
+from services.function_calling import FunctionCalling, tools, tool_call_message
+from utils.keyword_matcher import extract_mentions
+from common.metrics import span
+from config import CHAT_SINGLE_CALL, MAX_TOOL_ROUNDS, TOOL_TIMEOUT_SECONDS
 
 router = APIRouter()
 
-# 챗봇 및 함수 호출 관리 인스턴스 생성
-smartbot = Chatbot(model=model.Model.basic, system_role=system_role, instruction=instruction)
+# 세션별 챗봇 및 함수 호출 관리 인스턴스 생성
+chat_sessions = ChatSessionManager(
+    lambda: Chatbot(model=model.Model.basic, system_role=system_role, instruction=instruction)
+)
 func_calling = FunctionCalling(model=model.Model.basic)
+# 실행 중인 컨텍스트 압축 작업 (작업이 끝나기 전에 가비지 컬렉션되지 않도록 참조를 보관)
+_compaction_tasks = set()
 
 # --- [수정 1] API 요청 본문을 위한 Pydantic 모델 정의 ---
 # 프론트엔드에서 어떤 데이터를 보내야 하는지 명확하게 정의합니다.
@@ -26,6 +33,10 @@ func_calling = FunctionCalling(model=model.Model.basic)
 class ChatRequest(BaseModel):
     request_message: str
     preference: Optional[str] = None
+    # 대화 세션 ID. 없으면 새 세션을 만들고 응답으로 ID를 돌려줍니다.
+    session_id: Optional[str] = None
+    # true이면 답변 캐시를 사용하지 않고 항상 새로 답변을 생성합니다.
+    no_cache: bool = False
 
 @router.post("/chat-api")
 # --- [수정 2] API 함수의 파라미터를 Pydantic 모델로 변경 ---
@@ -34,6 +45,23 @@ async def chat_api(chat_request: ChatRequest):
     """
     사용자 메시지와 선호도를 받아 챗봇 응답을 반환합니다.
     """
+    session = chat_sessions.get(chat_request.session_id)
+    # 같은 세션의 요청이 동시에 들어와도 컨텍스트가 섞이지 않도록 순서대로 처리합니다.
+    async with session.lock:
+        try:
+            response_message = await _chat(session.chatbot, chat_request)
+        except BaseException:
+            session.chatbot.discard_user_message()
+            raise
+    chat_sessions.update_size(session)
+    _schedule_compaction(session)
+    return JSONResponse(content={"response_message": response_message, "session_id": session.session_id})
+
+
+def _prepare_message(chat_request: ChatRequest):
+    """
+    요청 메시지에 선호도 컨텍스트를 붙이고, 지역 및 날짜 키워드를 추출합니다.
+    """
     request_message = chat_request.request_message
     preference = chat_request.preference
     
@@ -46,23 +74,77 @@ async def chat_api(chat_request: ChatRequest):
         preference_context = f"[사용자 선호도: {preference}]"
         full_message = f"{preference_context}\n{request_message}"
     
-    # 지역 및 날짜 키워드 추출 로직
-    location_keywords = list(global_lat_lon.keys()) + seoul_keywords + gyeonggi_keywords
-    date_patterns = [r"이번 주말", r"내일", r"모레", r"다음주\s*[월화수목금토일]", r"\d{4}-\d{2}-\d{2}", r"오늘"]
-    
-    location = next((loc for loc in location_keywords if loc in request_message), None)
-    date_text = next((m.group(0) for pat in date_patterns if (m := re.search(pat, request_message))), None)
+    # 지역 및 날짜 키워드 추출 로직 (미리 만들어 둔 매처로 메시지를 한 번만 순회)
+    with span("extract"):
+        location, date_range = extract_mentions(request_message)
+    date = date_range.start.strftime("%Y-%m-%d") if date_range else None
+    return full_message, location, date
+
+
+async def _weather_prefix(location: str, date: str) -> Optional[str]:
+    """
+    지역과 날짜가 모두 있을 때 답변 앞에 붙일 날씨 예보 문장을 만듭니다.
+    예보 기간을 벗어난 날짜, 시간 초과, 네트워크 오류처럼 예보를 받지 못하면 None을 반환하고, 일반 답변으로 처리합니다.
+    """
+    get_weather_forecast = func_calling.available_async_functions["get_weather_forecast"]
+    try:
+        with span("weather"):
+            result = await asyncio.wait_for(get_weather_forecast(location=location, date=date), TOOL_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        print(f"날씨 예보 생략: {location} {date} 응답 시간 초과")
+        return None
+    except Exception as e:
+        print(f"날씨 예보 생략: {location} {date} 오류: {e}")
+        return None
+    if not isinstance(result, dict):
+        print(f"날씨 예보 생략: {result}")
+        return None
+    return f"{date} {location}의 날씨는 최고 {result.get('max_temperature')}도, {result.get('weather')}입니다. "
+
+
+def _finish_turn(smartbot: Chatbot) -> None:
+    """답변 생성 후 컨텍스트를 정리합니다."""
+    smartbot.trim_context()
+
+
+def _weather_note(weather_str: str) -> str:
+    """이미 조회한 날씨를 모델이 일정 추천에 반영하도록 요청별 참고 정보로 전달합니다."""
+    return f"[조회된 날씨 정보] {weather_str.strip()}\n이 날씨 안내는 답변 앞에 이미 붙어 있으니 반복하지 말고 일정 추천에 반영하세요."
+
+
+def _schedule_compaction(session) -> None:
+    """
+    컨텍스트가 토큰 예산을 넘었으면 응답을 보낸 뒤 백그라운드에서 오래된 대화를 요약합니다.
+    요약하는 동안에는 세션 잠금을 잡고 있으므로 같은 세션의 다음 요청은 요약이 끝난 뒤 처리됩니다.
+    """
+    if not session.chatbot.needs_compaction():
+        return
+
+    async def compact():
+        async with session.lock:
+            await session.chatbot.compact_async()
+        chat_sessions.update_size(session)
+
+    task = asyncio.create_task(compact())
+    _compaction_tasks.add(task)
+    task.add_done_callback(_compaction_tasks.discard)
+
+
+async def _chat(smartbot: Chatbot, chat_request: ChatRequest) -> str:
+    """
+    세션의 챗봇 컨텍스트에 메시지를 추가하고 답변을 생성합니다.
+    """
+    preference = chat_request.preference
+    use_cache = not chat_request.no_cache
+    full_message, location, date = _prepare_message(chat_request)
+    smartbot.remember(preference, location, date)
 
     # 날짜와 지역이 모두 있을 경우 날씨 예보를 직접 호출
-    if location and date_text:
-        date = parse_natural_date(date_text)
-        result = func_calling.available_functions["get_weather_forecast"](location=location, date=date)
-        
-        weather_str = f"{date} {location}의 날씨는 최고 {result.get('max_temperature')}도, {result.get('weather')}입니다. "
-        
+    weather_str = await _weather_prefix(location, date) if location and date else None
+    if weather_str:
         # 수정된 full_message를 챗봇에 전달합니다.
-        smartbot.add_user_message(full_message , preference=preference)
-        response = smartbot.send_request()
+        smartbot.add_user_message(full_message , preference=preference, note=_weather_note(weather_str))
+        response = await smartbot.send_request_async(use_cache=use_cache)
         smartbot.add_response(response)
         
         course_str = smartbot.get_response_content()
@@ -70,18 +152,118 @@ async def chat_api(chat_request: ChatRequest):
     else:
         # 수정된 full_message를 챗봇에 전달합니다.
         smartbot.add_user_message(full_message)
-        analyzed, analyzed_dict = func_calling.analyze(full_message, tools)
-        
-        if analyzed_dict.get("tool_calls"):
-            response = func_calling.run(analyzed, analyzed_dict, smartbot.context[:])
-            smartbot.add_response(response)
-            response_message = smartbot.get_response_content()
+        if CHAT_SINGLE_CALL:
+            # 답변 요청에 tools를 함께 보내고, 모델이 함수 호출을 요청한 경우에만 함수를 실행합니다.
+            response = await smartbot.send_request_async(tools=tools, use_cache=use_cache)
+            message = response["choices"][0]["message"]
+            if message.get("tool_calls"):
+                analyzed = tool_call_message(message)
+                response = await func_calling.run_async(analyzed, analyzed, smartbot.request_messages(), tools=tools)
         else:
-            response = smartbot.send_request()
-            smartbot.add_response(response)
-            response_message = smartbot.get_response_content()
+            analyzed, analyzed_dict = await func_calling.analyze_async(full_message, tools)
+            if analyzed_dict.get("tool_calls"):
+                response = await func_calling.run_async(analyzed, analyzed_dict, smartbot.request_messages(), tools=tools)
+            else:
+                response = await smartbot.send_request_async(use_cache=use_cache)
+        smartbot.add_response(response)
+        response_message = smartbot.get_response_content()
+
+    _finish_turn(smartbot)
+    print("response_message:", response_message)
+    return response_message
+
+
+def _sse(event: str, data: dict) -> str:
+    """Server-Sent Events 형식의 메시지 하나를 만듭니다."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@router.post("/chat-api/stream")
+async def chat_api_stream(chat_request: ChatRequest):
+    """
+    chat-api의 스트리밍 버전입니다. 답변을 Server-Sent Events로 토큰 단위로 전송합니다.
+    - session: 세션 ID
+    - delta: 답변 조각 (날씨 예보 문장은 가장 먼저 전송)
+    - done: 전체 답변
+    - error: 답변 생성 중 오류가 발생한 경우의 안내 메시지
+    """
+    session = chat_sessions.get(chat_request.session_id)
+    return StreamingResponse(
+        _chat_stream(session, chat_request),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def _chat_stream(session, chat_request: ChatRequest):
+    smartbot = session.chatbot
+    yield _sse("session", {"session_id": session.session_id})
+
+    async with session.lock:
+        preference = chat_request.preference
+        use_cache = not chat_request.no_cache
+        full_message, location, date = _prepare_message(chat_request)
+        smartbot.remember(preference, location, date)
+        prefix = ""
+        stream = None
+        # 함수 호출 결과가 쌓이는 컨텍스트 사본과 지금까지 진행한 함수 호출 라운드 수
+        tool_context = None
+        tool_rounds = 0
+        error = None
+        try:
+            if location and date:
+                prefix = await _weather_prefix(location, date) or ""
+            if prefix:
+                # 날씨 예보 문장은 답변 생성을 기다리지 않고 바로 전송합니다.
+                yield _sse("delta", {"text": prefix})
+                smartbot.add_user_message(full_message, preference=preference, note=_weather_note(prefix))
+                stream = smartbot.send_request_stream(use_cache=use_cache)
+            else:
+                smartbot.add_user_message(full_message)
+                if CHAT_SINGLE_CALL:
+                    stream = smartbot.send_request_stream(tools=tools, use_cache=use_cache)
+                else:
+                    analyzed, analyzed_dict = await func_calling.analyze_async(full_message, tools)
+                    if analyzed_dict.get("tool_calls"):
+                        tool_context = smartbot.request_messages()
+                        tool_rounds = 1
+                        round_tools = tools if tool_rounds < MAX_TOOL_ROUNDS else None
+                        stream = await func_calling.run_stream(analyzed, analyzed_dict, tool_context, tools=round_tools)
+                    else:
+                        stream = smartbot.send_request_stream(use_cache=use_cache)
+
+            async for delta in stream.deltas():
+                yield _sse("delta", {"text": delta})
+
+            # 모델이 답변 대신 함수 호출을 요청한 경우에만 함수를 실행하고 최종 답변을 이어서 전송합니다.
+            # 마지막 라운드에는 tools를 빼서 반드시 답변으로 끝나도록 합니다.
+            while stream.tool_calls and tool_rounds < MAX_TOOL_ROUNDS:
+                if tool_context is None:
+                    tool_context = smartbot.request_messages()
+                tool_rounds += 1
+                analyzed = tool_call_message(stream.response["choices"][0]["message"])
+                round_tools = tools if tool_rounds < MAX_TOOL_ROUNDS else None
+                stream = await func_calling.run_stream(analyzed, analyzed, tool_context, tools=round_tools)
+                async for delta in stream.deltas():
+                    yield _sse("delta", {"text": delta})
+        except Exception as e:
+            # 응답 헤더를 이미 보냈으므로 오류는 error 이벤트로 알립니다.
+            error = e
+        finally:
+            # 클라이언트 연결이 끊겨도 지금까지 생성된 답변으로 컨텍스트를 정리합니다.
+            if stream is not None and stream.parts:
+                smartbot.add_response(stream.response)
+                _finish_turn(smartbot)
+            else:
+                smartbot.discard_user_message()
+            chat_sessions.update_size(session)
+
+    if error is not None:
+        print(f"Chat stream error: {error!r}")
+        yield _sse("error", {"message": "답변을 생성하는 중 오류가 발생했습니다."})
+        return
 
-    smartbot.handle_token_limit(response)
-    smartbot.clean_context()
+    _schedule_compaction(session)
+    response_message = f"{prefix}{stream.content}"
     print("response_message:", response_message)
-    return JSONResponse(content={"response_message": response_message})
+    yield _sse("done", {"response_message": response_message})
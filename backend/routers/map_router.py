@@ -1,16 +1,28 @@
 """
 지도 페이지 렌더링 및 위치 데이터 API 라우터를 정의합니다.
 """
-from fastapi import APIRouter, Request, Depends
-from fastapi.responses import HTMLResponse
+from fastapi import APIRouter, Request, Depends, HTTPException, Query
+from fastapi.responses import HTMLResponse, Response
 from fastapi.templating import Jinja2Templates
-from typing import List
-from schemas.map_schema import Location
+from typing import List, Literal, Optional
+from schemas.map_schema import Location, NearbyLocation, Cluster
 from services import map_service
 
 router = APIRouter()
 templates = Jinja2Templates(directory="templates")
 
+
+def _places(kind: str, bbox: Optional[str]):
+    """bbox가 주어지면 해당 영역의 위치만, 아니면 전체 위치를 반환합니다."""
+    if not bbox:
+        # 전체 목록은 미리 직렬화해 둔 JSON을 그대로 보내, 요청마다 dict 생성과 응답 검증을 반복하지 않습니다.
+        return Response(content=map_service.get_store(kind).records_json(), media_type="application/json")
+    try:
+        return map_service.query_bbox(kind, map_service.parse_bbox(bbox))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 @router.get("/", response_class=HTMLResponse)
 async def get_map_page(request: Request):
     """
@@ -19,15 +31,45 @@ async def get_map_page(request: Request):
     return templates.TemplateResponse("map.html", {"request": request})
 
 @router.get("/parks", response_model=List[Location])
-async def get_parks_data():
+async def get_parks_data(bbox: Optional[str] = Query(None, description="south,west,north,east")):
     """
     도시공원 위치 데이터를 JSON으로 반환합니다.
+    bbox가 주어지면 해당 영역 안의 공원만 반환합니다.
     """
-    return map_service.load_parks_data()
+    return _places("parks", bbox)
 
 @router.get("/restaurants", response_model=List[Location])
-async def get_restaurants_data():
+async def get_restaurants_data(bbox: Optional[str] = Query(None, description="south,west,north,east")):
     """
     모범음식점 위치 데이터를 JSON으로 반환합니다.
+    bbox가 주어지면 해당 영역 안의 음식점만 반환합니다.
+    """
+    return _places("restaurants", bbox)
+
+@router.get("/nearby", response_model=List[NearbyLocation])
+async def get_nearby_places(
+    lat: float = Query(..., ge=-90, le=90),
+    lng: float = Query(..., ge=-180, le=180),
+    radius_m: float = Query(1000, gt=0, le=50000),
+    kind: Literal["parks", "restaurants"] = "parks",
+    limit: Optional[int] = Query(None, gt=0),
+):
+    """
+    중심 좌표에서 반경(radius_m) 안에 있는 위치를 가까운 순으로 반환합니다.
+    """
+    return map_service.query_nearby(kind, lat, lng, radius_m, limit)
+
+
+@router.get("/clusters", response_model=List[Cluster])
+async def get_clusters(
+    level: int = Query(..., ge=1, le=map_service.MAP_MAX_LEVEL, description="카카오맵 확대 수준"),
+    bbox: str = Query(..., description="south,west,north,east"),
+    kind: Literal["parks", "restaurants"] = "parks",
+):
+    """
+    지도 확대 수준에 맞게 미리 묶어 둔 위치 클러스터를 화면 영역 기준으로 반환합니다.
     """
-    return map_service.load_restaurants_data()
\ No newline at end of file
+    try:
+        return map_service.query_clusters(kind, level, map_service.parse_bbox(bbox))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
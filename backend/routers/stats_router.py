@@ -0,0 +1,46 @@
+"""
+서버 내부 상태(연결 풀, 캐시 등)를 확인하는 통계 API 라우터를 정의합니다.
+"""
+from fastapi import APIRouter
+from common import http_client
+from common.client import usage_stats
+from utils import security
+from services import weather_service, search_service, chatbot_service
+
+router = APIRouter()
+
+
+@router.get("/http")
+def get_http_stats():
+    """
+    외부 API 연결 풀 설정과 호스트별 요청/재시도/오류 통계를 반환합니다.
+    """
+    return http_client.pool_stats()
+
+
+@router.get("/cache")
+def get_cache_stats():
+    """
+    날씨 조회, 인터넷 검색, 챗봇 답변 캐시의 적중/실패 통계를 반환합니다.
+    """
+    return {
+        "weather": weather_service.weather_cache_stats(),
+        "search": search_service.search_cache_stats(),
+        "chat_response": chatbot_service.response_cache_stats(),
+    }
+
+
+@router.get("/openai")
+def get_openai_stats():
+    """
+    OpenAI 요청의 누적 토큰 사용량과 프롬프트 캐시 적중 토큰(cached_tokens) 비율을 반환합니다.
+    """
+    return usage_stats.snapshot()
+
+
+@router.get("/password-pool")
+def get_password_pool_stats():
+    """
+    비밀번호 해시 프로세스 풀의 설정과 현재 대기 작업 수를 반환합니다.
+    """
+    return security.pool_stats()
@@ -1,34 +1,46 @@
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from database import get_db
 from models.user import User
 from schemas.user import UserCreate, UserLogin, UserResponse
-from utils.security import hash_password, verify_password
+from utils.security import hash_password_async, verify_password_async, needs_rehash, PasswordPoolBusy
 from utils.auth import create_access_token, logout_token, bearer_scheme
 
 router = APIRouter()
 
+# 비밀번호 해시는 전용 프로세스 풀에서 처리하고, 핸들러는 async로 두어 공용 스레드 풀을 차지하지 않도록 합니다.
+# DB 조회/저장은 동기 함수이므로 run_in_threadpool로 실행합니다.
+
+
+def _find_user(db: Session, email: str):
+    return db.query(User).filter(User.email == email).first()
+
+
+def _save_user(db: Session, user: User):
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+    return user
+
 
 @router.post("/signup/", response_model=UserResponse)
-def signup(user: UserCreate, db: Session = Depends(get_db)):
-    existing_user = db.query(User).filter(User.email == user.email).first()
+async def signup(user: UserCreate, db: Session = Depends(get_db)):
+    existing_user = await run_in_threadpool(_find_user, db, user.email)
     if existing_user:
         raise HTTPException(status_code=400, detail="이미 존재하는 이메일입니다.")
-    hashed_pw = hash_password(user.password)
+    hashed_pw = await hash_password_async(user.password)
     new_user = User(email=user.email, username=user.username, hashed_password=hashed_pw)
-    db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
-    return new_user
+    return await run_in_threadpool(_save_user, db, new_user)
 
 
 @router.post("/login/")
-def login(user: UserLogin, db: Session = Depends(get_db)):
+async def login(user: UserLogin, db: Session = Depends(get_db)):
     # 1. 이메일로 사용자를 찾습니다.
-    db_user = db.query(User).filter(User.email == user.email).first()
+    db_user = await run_in_threadpool(_find_user, db, user.email)
 
     # 2. 사용자가 없거나 비밀번호가 틀리면, 401 에러를 발생시킵니다.
-    if not db_user or not verify_password(user.password, db_user.hashed_password):
+    if not db_user or not await verify_password_async(user.password, db_user.hashed_password):
         raise HTTPException(
             status_code=401,
             detail="이메일 또는 비밀번호가 올바르지 않습니다."
@@ -36,13 +48,26 @@ def login(user: UserLogin, db: Session = Depends(get_db)):
 
     # 3. 로그인 성공 시, 사용자 정보를 담은 데이터를 반드시 return 합니다.
     #    (이 return 구문이 없으면 빈 응답이 갑니다!)
-    return {
+    result = {
         "message": "로그인 성공!",
         "user_id": db_user.id,
         "username": db_user.username,
-        "email": db_user.email
+        "email": db_user.email,
+        # 토큰에 사용자 id를 넣어 두어 인증이 필요한 API가 사용자 조회 없이 id를 사용할 수 있게 합니다.
+        "access_token": create_access_token({"sub": db_user.email}, user_id=db_user.id),
+        "token_type": "bearer",
     }
 
+    # BCRYPT_ROUNDS가 바뀌었으면 로그인에 성공한 비밀번호로 새 cost의 해시를 만들어 저장합니다.
+    if needs_rehash(db_user.hashed_password):
+        try:
+            db_user.hashed_password = await hash_password_async(user.password)
+            await run_in_threadpool(db.commit)
+        except PasswordPoolBusy:
+            # 해시 작업이 몰려 있으면 이번에는 건너뛰고 다음 로그인에서 다시 시도합니다.
+            pass
+    return result
+
 @router.post("/logout/")
 def logout(token=Depends(bearer_scheme)):
     logout_token(token.credentials)
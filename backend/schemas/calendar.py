@@ -1,15 +1,25 @@
+import datetime
+from typing import List
 from pydantic import BaseModel
 
 
 class CalendarEventCreate(BaseModel):
-    date: str
+    date: datetime.date  # YYYY-MM-DD
     title: str
 
 
 class CalendarEventResponse(BaseModel):
     id: int
-    date: str
+    date: datetime.date
     title: str
 
     class Config:
         from_attributes = True
+
+
+class CalendarEventUpdate(CalendarEventCreate):
+    id: int
+
+
+class CalendarBulkDelete(BaseModel):
+    ids: List[int]
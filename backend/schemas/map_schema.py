@@ -2,10 +2,19 @@
 지도에 표시될 위치 정보에 대한 Pydantic 스키마를 정의합니다.
 """
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 
 class Location(BaseModel):
     name: str
     lat: float
     lng: float
-    tel: Optional[str] = None
\ No newline at end of file
+    tel: Optional[str] = None
+
+class NearbyLocation(Location):
+    distance_m: float
+
+
+class Cluster(Location):
+    count: int
+    # 더 확대해도 나눌 수 없는(좌표가 같은) 위치 묶음의 전체 목록
+    places: Optional[List[Location]] = None
\ No newline at end of file
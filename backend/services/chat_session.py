@@ -0,0 +1,123 @@
+"""
+사용자(세션)별 챗봇 대화 컨텍스트를 관리합니다.
+오래 사용하지 않은 세션은 TTL/LRU 기준으로 정리하고, 전체 메모리 사용량을 제한합니다.
+"""
+import asyncio
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Callable, Optional
+
+from config import (
+    CHAT_SESSION_TTL_SECONDS,
+    CHAT_SESSION_MAX_SESSIONS,
+    CHAT_SESSION_MAX_TOTAL_CHARS,
+)
+from services.chatbot_service import Chatbot
+
+
+class ChatSession:
+    """하나의 대화 세션(챗봇 컨텍스트와 동시 요청 방지용 잠금)을 나타냅니다."""
+    def __init__(self, session_id: str, chatbot: Chatbot):
+        self.session_id = session_id
+        self.chatbot = chatbot
+        self.lock = asyncio.Lock()
+        self.last_access = time.monotonic()
+        self.size = 0
+
+    def measure(self) -> int:
+        """시스템 프롬프트를 제외한 컨텍스트와 대화 요약의 글자 수를 계산합니다."""
+        return sum(len(str(m.get("content") or "")) for m in self.chatbot.context[1:]) + len(self.chatbot.summary)
+
+
+class ChatSessionManager:
+    """
+    세션 ID별 ChatSession을 LRU 순서로 보관합니다.
+    - ttl_seconds 동안 사용되지 않은 세션은 제거합니다.
+    - 세션 수가 max_sessions, 전체 컨텍스트 글자 수가 max_total_chars를 넘으면 가장 오래된 세션부터 제거합니다.
+    """
+    def __init__(
+        self,
+        chatbot_factory: Callable[[], Chatbot],
+        ttl_seconds: int = CHAT_SESSION_TTL_SECONDS,
+        max_sessions: int = CHAT_SESSION_MAX_SESSIONS,
+        max_total_chars: int = CHAT_SESSION_MAX_TOTAL_CHARS,
+    ):
+        self.chatbot_factory = chatbot_factory
+        self.ttl_seconds = ttl_seconds
+        self.max_sessions = max_sessions
+        self.max_total_chars = max_total_chars
+        self._sessions: "OrderedDict[str, ChatSession]" = OrderedDict()
+        self._total_chars = 0
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def get(self, session_id: Optional[str] = None) -> ChatSession:
+        """
+        세션을 찾아 반환합니다. 없으면 새 ID를 발급해 새 세션을 만듭니다.
+        만료되었거나 알 수 없는 session_id를 그대로 쓰면 클라이언트가 정한 ID로 세션이 생기므로,
+        이 경우에도 서버에서 새 ID를 발급합니다. (호출한 쪽은 반환된 session.session_id를 클라이언트에 알려야 합니다.)
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._evict_expired(now)
+            session = self._sessions.get(session_id) if session_id else None
+            if session is None:
+                session = ChatSession(uuid.uuid4().hex, self.chatbot_factory())
+                self._sessions[session.session_id] = session
+                self._enforce_limits(keep=session.session_id)
+            else:
+                self._sessions.move_to_end(session.session_id)
+            session.last_access = now
+            return session
+
+    def update_size(self, session: ChatSession) -> None:
+        """요청 처리 후 세션의 컨텍스트 크기를 다시 계산하고 전체 메모리 제한을 적용합니다."""
+        new_size = session.measure()
+        with self._lock:
+            if self._sessions.get(session.session_id) is not session:
+                return
+            self._total_chars += new_size - session.size
+            session.size = new_size
+            self._enforce_limits(keep=session.session_id)
+
+    def remove(self, session_id: str) -> None:
+        with self._lock:
+            self._pop(session_id)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "sessions": len(self._sessions),
+                "total_chars": self._total_chars,
+                "evictions": self.evictions,
+            }
+
+    def _pop(self, session_id: str) -> None:
+        session = self._sessions.pop(session_id, None)
+        if session is not None:
+            self._total_chars -= session.size
+
+    def _evict_expired(self, now: float) -> None:
+        # OrderedDict는 마지막 사용 순서로 정렬되어 있으므로 앞에서부터 만료 여부를 확인합니다.
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if now - session.last_access < self.ttl_seconds:
+                break
+            self._pop(session_id)
+            self.evictions += 1
+
+    def _enforce_limits(self, keep: str) -> None:
+        while len(self._sessions) > 1 and (
+            len(self._sessions) > self.max_sessions or self._total_chars > self.max_total_chars
+        ):
+            session_id = next(iter(self._sessions))
+            if session_id == keep:
+                self._sessions.move_to_end(session_id)
+                session_id = next(iter(self._sessions))
+            self._pop(session_id)
+            self.evictions += 1
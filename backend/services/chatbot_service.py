@@ -2,9 +2,19 @@
 챗봇의 대화 컨텍스트 관리 및 답변 생성 로직을 포함합니다.
 시스템 역할 및 인스트럭션 프롬프트를 정의합니다.
 """
-import math
+import hashlib
+import json
+from functools import lru_cache
 from typing import Optional # 타입 힌트를 위해 추가
-from common.client import client, makeup_response, gpt_num_tokens
+from common.client import async_client, makeup_response, message_num_tokens, record_usage, CompletionStream
+from common.cache import TTLCache, normalize_key
+from common.metrics import span
+from config import (
+    CHAT_SESSION_MAX_MESSAGES, CHAT_RESPONSE_CACHE_ENABLED, CHAT_RESPONSE_CACHE_TTL_SECONDS,
+    CHAT_RESPONSE_CACHE_MAXSIZE, CHAT_RESPONSE_CACHE_CONTEXT_MESSAGES,
+    CHAT_CONTEXT_TOKEN_BUDGET, CHAT_COMPACT_TARGET_RATIO, CHAT_COMPACT_KEEP_MESSAGES,
+    CHAT_SUMMARY_MAX_TOKENS, CHAT_SUMMARY_MAX_CHARS,
+)
 
 # --- [수정] 챗봇의 시스템 역할 프롬프트 개선 ---
 # AI가 선호도 정보의 중요성을 인지하도록 지침을 추가합니다.
@@ -30,58 +40,228 @@ instruction:
 4. 어떤 상황에서도 인공지능인지 눈치채지 못하도록 자연스럽게 답변하고, 항상 친절할 것.
 """
 
+# 오래된 대화를 요약할 때 사용하는 프롬프트
+summary_prompt = """
+다음은 사용자와 'SMART DAY' 챗봇의 이전 대화 요약과 그 뒤에 이어진 대화입니다.
+두 내용을 합쳐 새로운 요약을 한국어로 5문장 이내로 작성하세요.
+사용자의 선호, 언급한 지역과 날짜, 이미 안내한 날씨와 확정된 일정은 빠뜨리지 말고, 인사말 등 불필요한 내용은 생략하세요.
+"""
+
+# 고정 정보 종류별 이름과 종류별로 보관할 최대 개수
+PIN_LABELS = (("preferences", "선호도"), ("locations", "지역"), ("dates", "날짜"))
+PIN_MAX_ITEMS = 5
+ROLE_LABELS = {"user": "사용자", "assistant": "챗봇"}
+
+# (프롬프트 버전, 모델, 선호도, 직전 대화 해시, 메시지, tools 사용 여부) -> 답변 캐시
+response_cache = TTLCache(maxsize=CHAT_RESPONSE_CACHE_MAXSIZE, ttl=CHAT_RESPONSE_CACHE_TTL_SECONDS)
+
+def _digest(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+@lru_cache(maxsize=4)
+def _system_prompt(system_role, instruction):
+    """
+    시스템 메시지 내용과 토큰 수를 반환합니다.
+    모든 대화가 같은 프롬프트로 시작하므로 세션마다 다시 인코딩하지 않도록 한 번만 계산합니다.
+    """
+    content = f"{system_role.strip()}\n\n{instruction.strip()}"
+    return content, message_num_tokens({"role": "system", "content": content})
+
+def _is_cacheable(response):
+    """함수 호출 없이 정상적으로 끝난 답변만 캐시합니다."""
+    choice = response["choices"][0]
+    return choice["finish_reason"] == "stop" and not choice["message"].get("tool_calls")
+
+def response_cache_stats():
+    """챗봇 답변 캐시의 적중률 통계를 반환합니다."""
+    return response_cache.stats()
+
 class Chatbot:
-    def __init__(self, model, system_role, instruction):
-        self.context = [{"role": "system", "content": system_role}]
+    def __init__(self, model, system_role, instruction, max_context_messages=CHAT_SESSION_MAX_MESSAGES):
+        self.context = []
+        # context의 각 메시지 토큰 수와 그 합계를 함께 관리하여 매 요청마다 전체를 다시 인코딩하지 않습니다.
+        self.context_tokens = []
+        self.total_tokens = 0
         self.model = model
+        # 시스템 프롬프트와 instruction은 모든 사용자/대화에서 바이트 단위로 같은 접두부가 되도록 하나의 메시지로 고정합니다.
+        # (OpenAI 프롬프트 캐싱은 요청 앞부분이 이전 요청과 같을 때만 적용됩니다.)
+        content, tokens = _system_prompt(system_role, instruction)
+        self._append_message({"role": "system", "content": content}, tokens)
         self.instruction = instruction
+        # 프롬프트가 바뀌면 이전 프롬프트로 만든 캐시 답변을 사용하지 않도록 캐시 키에 포함합니다.
+        self.prompt_version = _digest(system_role + instruction)
         self.max_token_size = 16 * 1024
+        # 시스템 메시지를 제외하고 보관할 최대 대화 메시지 수
+        self.max_context_messages = max_context_messages
+        # 요청 전에 맞춰야 하는 컨텍스트 토큰 예산. 넘으면 오래된 대화를 요약으로 옮깁니다.
+        self.token_budget = CHAT_CONTEXT_TOKEN_BUDGET
+        # 요약된 이전 대화와 대화 중 언급된 선호도/지역/날짜 (요청마다 마지막 메시지로 전송)
+        self.summary = ""
+        self.pinned = {key: [] for key, _ in PIN_LABELS}
         # --- [추가] 현재 요청에 대한 선호도를 임시 저장할 변수 ---
         self.current_preference: Optional[str] = None
+        # 현재 요청에만 참고할 추가 정보 (예: 이미 조회한 날씨)
+        self.current_note: Optional[str] = None
 
     # --- [수정] add_user_message 메소드가 preference를 받도록 변경 ---
-    def add_user_message(self, user_message: str, preference: Optional[str] = None):
-        self.context.append({"role": "user", "content": user_message})
-        # 전달받은 선호도를 인스턴스 변수에 저장합니다.
+    def add_user_message(self, user_message: str, preference: Optional[str] = None, note: Optional[str] = None):
+        self._append_message({"role": "user", "content": user_message})
+        # 전달받은 선호도와 참고 정보는 이번 요청에만 적용되며, 대화 기록에는 남기지 않습니다.
         self.current_preference = preference
+        self.current_note = note
+
+    def discard_user_message(self):
+        """답변을 받지 못한 마지막 사용자 메시지를 제거하여, 다음 요청에 사용자 메시지가 연달아 들어가지 않도록 합니다."""
+        if len(self.context) > 1 and self.context[-1]["role"] == "user":
+            self._pop_message()
+        self.current_preference = None
+        self.current_note = None
+
+    def _append_message(self, message, tokens=None):
+        if tokens is None:
+            tokens = message_num_tokens(message)
+        self.context.append(message)
+        self.context_tokens.append(tokens)
+        self.total_tokens += tokens
+
+    def _pop_message(self):
+        self.total_tokens -= self.context_tokens.pop()
+        return self.context.pop()
+
+    def _set_content(self, idx, content):
+        self.context[idx]["content"] = content
+        tokens = message_num_tokens(self.context[idx])
+        self.total_tokens += tokens - self.context_tokens[idx]
+        self.context_tokens[idx] = tokens
+
+    def _drop_messages(self, count):
+        """시스템 메시지 바로 뒤의 오래된 메시지 count개를 제거합니다."""
+        if count <= 0:
+            return
+        self.total_tokens -= sum(self.context_tokens[1 : count + 1])
+        self.context = [self.context[0]] + self.context[count + 1 :]
+        self.context_tokens = [self.context_tokens[0]] + self.context_tokens[count + 1 :]
+
+    def num_tokens(self):
+        """요청에 보낼 메시지의 토큰 수입니다. (request_messages()의 메시지별 토큰 수 합계 + 응답 시작 3토큰)"""
+        tail = self._tail_message()
+        return self.total_tokens + (message_num_tokens(tail) if tail else 0) + 3
+
+    def _tail_message(self):
+        """
+        요청마다 달라지는 정보(대화 요약, 고정 정보, 선호도, 참고 정보)를 모은 시스템 메시지입니다.
+        앞쪽 메시지가 요청 간에 그대로 유지되도록 항상 맨 뒤에 붙입니다.
+        """
+        parts = []
+        if self.summary:
+            parts.append(f"[이전 대화 요약]\n{self.summary}")
+        pins = [f"{label}: {', '.join(self.pinned[key])}" for key, label in PIN_LABELS if self.pinned[key]]
+        if pins:
+            parts.append("[기억할 사용자 정보]\n" + "\n".join(pins))
+        if self.current_note:
+            parts.append(self.current_note)
+        # 선호도가 있다면, 특별 지시를 추가합니다.
+        if self.current_preference:
+            parts.append(f"[!IMPORTANT] 사용자의 현재 선호도는 '{self.current_preference}'입니다. 이 선호도를 최우선으로 고려하여 답변을 생성하세요.")
+        if not parts:
+            return None
+        return {"role": "system", "content": "\n\n".join(parts)}
+
+    def request_messages(self):
+        """API에 보낼 메시지 목록입니다. 고정된 시스템 프롬프트와 대화 기록 뒤에 요청별 정보를 붙입니다."""
+        tail = self._tail_message()
+        return self.context + [tail] if tail else self.context[:]
+
+    def _request_params(self, tools=None):
+        params = dict(
+            model=self.model,
+            messages=self.request_messages(),
+            temperature=0.5,
+            top_p=1,
+            max_tokens=256,
+            frequency_penalty=0,
+            presence_penalty=0,
+        )
+        # tools를 함께 보내면 함수 호출 여부 판단과 답변 생성을 한 번의 요청으로 처리합니다.
+        if tools:
+            params.update(tools=tools, tool_choice="auto")
+        return params
+
+    def _exceeds_token_limit(self):
+        if self.num_tokens() > self.max_token_size:
+            self._pop_message()
+            return True
+        return False
 
-    def _send_request(self):
+    async def _send_request_async(self, tools=None):
         try:
-            if gpt_num_tokens(self.context) > self.max_token_size:
-                self.context.pop()
+            if self._exceeds_token_limit():
                 return makeup_response("메세지를 조금 짧게 보내주세요.")
-            
-            response = client.chat.completions.create(
-                model=self.model,
-                messages=self.context,
-                temperature=0.5,
-                top_p=1,
-                max_tokens=256,
-                frequency_penalty=0,
-                presence_penalty=0,
-            ).model_dump()
+
+            with span("completion"):
+                response = (await async_client.chat.completions.create(**self._request_params(tools))).model_dump()
+            record_usage(response.get("usage"))
             return response
         except Exception as e:
             print(f"Exception 오류({type(e)}) 발생:{e}")
             return makeup_response("[SmartDayBot에 문제가 발생했습니다. 잠시 뒤에 다시 이용해주세요.]")
 
-    # --- [수정] send_request 메소드가 선호도에 따라 instruction을 동적으로 변경 ---
-    def send_request(self):
-        final_instruction = self.instruction
+    def _cache_key(self, tools=None):
+        """
+        마지막 사용자 메시지와 요청별 정보(_tail_message)에 대한 답변 캐시 키를 만듭니다.
+        """
+        if not CHAT_RESPONSE_CACHE_ENABLED or self.context[-1]["role"] != "user":
+            return None
+        recent = [(m["role"], normalize_key(m.get("content") or "")) for m in self.context[1:-1][-CHAT_RESPONSE_CACHE_CONTEXT_MESSAGES:]]
+        tail = self._tail_message()
+        if tail is not None:
+            recent.append(("tail", tail["content"]))
+        return (
+            self.prompt_version,
+            self.model,
+            normalize_key(self.current_preference or ""),
+            _digest(json.dumps(recent, ensure_ascii=False)),
+            normalize_key(self.context[-1]["content"]),
+            bool(tools),
+        )
 
-        # 임시 저장된 선호도가 있다면, 특별 지시를 추가합니다.
-        if self.current_preference:
-            preference_instruction = f"\n\n[!IMPORTANT] 사용자의 현재 선호도는 '{self.current_preference}'입니다. 이 선호도를 최우선으로 고려하여 답변을 생성하세요."
-            final_instruction += preference_instruction
-            # 사용 후에는 초기화하여 다음 메시지에 영향을 주지 않도록 합니다.
-            self.current_preference = None 
-        
-        self.context[-1]["content"] += final_instruction
-        return self._send_request()
+    def _store_response(self, key, response):
+        if key is not None and _is_cacheable(response):
+            response_cache.set(key, response)
+
+    async def send_request_async(self, tools=None, use_cache=True):
+        """
+        OpenAI 응답을 기다리는 동안 이벤트 루프를 막지 않고 답변을 요청합니다.
+        use_cache가 False이면 캐시를 조회하지도 저장하지도 않습니다.
+        """
+        key = self._cache_key(tools) if use_cache else None
+        self._enforce_budget()
+        cached = response_cache.get(key) if key is not None else None
+        if cached is not None:
+            return cached
+        response = await self._send_request_async(tools)
+        self._store_response(key, response)
+        return response
+
+    def send_request_stream(self, tools=None, use_cache=True) -> CompletionStream:
+        """
+        send_request_async의 스트리밍 버전입니다. 답변을 토큰 조각 단위로 내보내는 스트림을 반환합니다.
+        """
+        key = self._cache_key(tools) if use_cache else None
+        self._enforce_budget()
+        cached = response_cache.get(key) if key is not None else None
+        if cached is not None:
+            return CompletionStream.of(cached["choices"][0]["message"]["content"], "stop")
+        if self._exceeds_token_limit():
+            return CompletionStream.of("메세지를 조금 짧게 보내주세요.")
+        stream = CompletionStream(**self._request_params(tools))
+        if key is not None:
+            stream.on_complete = lambda response: self._store_response(key, response)
+        return stream
 
     def add_response(self, response):
         content = response["choices"][0]["message"]["content"]
-        self.context.append({
+        self._append_message({
             "role": response["choices"][0]["message"]["role"],
             "content": content,
         })
@@ -89,19 +269,95 @@ class Chatbot:
     def get_response_content(self):
         return self.context[-1]["content"]
 
-    def clean_context(self):
-        for idx in reversed(range(len(self.context))):
-            if self.context[idx]["role"] == "user":
-                self.context[idx]["content"] = self.context[idx]["content"].split("instruction:\n")[0].strip()
-                break
+    def trim_context(self):
+        """시스템 메시지와 최근 max_context_messages개의 메시지만 남기고, 나머지는 요약으로 옮깁니다."""
+        count = len(self.context) - 1 - self.max_context_messages
+        if count > 0:
+            self._fold(count, self._extractive_summary(self.context[1 : count + 1]))
+
+    # --- 컨텍스트 압축: 오래된 대화는 요약으로, 선호도/지역/날짜는 고정 정보로 유지 ---
+    def remember(self, preference=None, location=None, date=None):
+        """대화가 요약되어도 잃지 않도록 선호도/지역/날짜를 고정 정보로 기록합니다."""
+        for key, value in (("preferences", preference), ("locations", location), ("dates", date)):
+            if not value:
+                continue
+            values = self.pinned[key]
+            if value in values:
+                values.remove(value)
+            values.append(value)
+            del values[:-PIN_MAX_ITEMS]
+
+    def _fold_count(self):
+        """
+        토큰 예산을 넘었을 때 요약으로 옮길 오래된 메시지 수를 계산합니다.
+        예산의 CHAT_COMPACT_TARGET_RATIO까지 줄이되, 최근 CHAT_COMPACT_KEEP_MESSAGES개는 그대로 남깁니다.
+        """
+        if self.num_tokens() <= self.token_budget:
+            return 0
+        excess = self.num_tokens() - self.token_budget * CHAT_COMPACT_TARGET_RATIO
+        limit = len(self.context) - 1 - CHAT_COMPACT_KEEP_MESSAGES
+        count = 0
+        while count < limit and excess > 0:
+            count += 1
+            excess -= self.context_tokens[count]
+        return count
+
+    def needs_compaction(self):
+        return self._fold_count() > 0
+
+    def _fold(self, count, summary):
+        self.summary = summary
+        self._drop_messages(count)
+
+    def _extractive_summary(self, messages):
+        """API 호출 없이 기존 요약 뒤에 메시지 앞부분을 이어 붙여 요약을 만듭니다."""
+        lines = self.summary.splitlines()
+        for message in messages:
+            content = (message.get("content") or "").strip()
+            if content and message["role"] in ROLE_LABELS:
+                lines.append(f"- {ROLE_LABELS[message['role']]}: {' '.join(content.split())[:120]}")
+        # 글자 수 제한을 넘으면 가장 오래된 줄부터 버립니다.
+        while lines and len("\n".join(lines)) > CHAT_SUMMARY_MAX_CHARS:
+            lines.pop(0)
+        return "\n".join(lines)
+
+    def _summary_params(self, messages):
+        transcript = "\n".join(
+            f"{ROLE_LABELS[m['role']]}: {(m.get('content') or '').strip()}"
+            for m in messages if m["role"] in ROLE_LABELS
+        )
+        return dict(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": summary_prompt},
+                {"role": "user", "content": f"[이전 대화 요약]\n{self.summary or '없음'}\n\n[대화]\n{transcript}"},
+            ],
+            temperature=0,
+            max_tokens=CHAT_SUMMARY_MAX_TOKENS,
+        )
+
+    def _enforce_budget(self):
+        """요청 직전에 토큰 예산을 넘으면 API 호출 없이 요약으로 옮겨 예산을 맞춥니다."""
+        count = self._fold_count()
+        if count:
+            self._fold(count, self._extractive_summary(self.context[1 : count + 1]))
 
-    def handle_token_limit(self, response):
+    async def compact_async(self):
+        """토큰 예산을 넘었으면 오래된 대화를 모델로 요약하여 옮깁니다. 압축했으면 True를 반환합니다."""
+        count = self._fold_count()
+        if not count:
+            return False
+        messages = self.context[1 : count + 1]
         try:
-            if response["usage"]["total_tokens"] > self.max_token_size:
-                remove_size = math.ceil(len(self.context) / 10)
-                self.context = [self.context[0]] + self.context[remove_size + 1 :]
+            with span("summary"):
+                response = await async_client.chat.completions.create(**self._summary_params(messages))
+            record_usage(response.usage)
+            summary = response.choices[0].message.content.strip()[:CHAT_SUMMARY_MAX_CHARS]
         except Exception as e:
-            print(f"handle_token_limit exception:{e}")
+            print(f"compact exception:{e}")
+            summary = self._extractive_summary(messages)
+        self._fold(count, summary)
+        return True
 
 
 
@@ -4,11 +4,13 @@ OpenAI function calling을 관리하고 외부 함수를 연결합니다.
 사용자 메시지를 분석하여 필요한 함수를 호출하고 결과를 처리합니다.
 """
 import json
-import os
-from common.client import client
+import asyncio
+from common.client import async_client, makeup_response, record_usage, CompletionStream
 from common import model
-from services.weather_service import get_weather_forecast, get_celsius_temperature
-from services.search_service import search_internet
+from common.metrics import span
+from services.weather_service import get_weather_forecast_async, get_celsius_temperature_async
+from services.search_service import search_internet_async
+from config import TOOL_TIMEOUT_SECONDS, MAX_TOOL_ROUNDS
 
 # OpenAI에 등록할 함수 목록
 tools = [
@@ -53,59 +55,106 @@ tools = [
     },
 ]
 
+def tool_call_message(message):
+    """
+    tool_calls가 담긴 답변 메시지(dict)를 다음 요청의 컨텍스트에 넣을 assistant 메시지로 정리합니다.
+    """
+    return {
+        "role": "assistant",
+        "content": message.get("content"),
+        "tool_calls": [
+            {"id": tc["id"], "type": "function", "function": {"name": tc["function"]["name"], "arguments": tc["function"]["arguments"]}}
+            for tc in message["tool_calls"]
+        ],
+    }
+
 class FunctionCalling:
     def __init__(self, model):
         self.model = model
-        self.available_functions = {
-            "get_celsius_temperature": lambda **kwargs: get_celsius_temperature(kwargs["location"]),
-            "search_internet": lambda **kwargs: search_internet(kwargs["search_query"]),
-            "get_weather_forecast": lambda **kwargs: get_weather_forecast(kwargs["location"], kwargs["date"]),
+        # 이벤트 루프를 막지 않는 비동기 함수 목록 (awaitable을 반환)
+        self.available_async_functions = {
+            "get_celsius_temperature": lambda **kwargs: get_celsius_temperature_async(kwargs["location"]),
+            "search_internet": lambda **kwargs: search_internet_async(kwargs["search_query"]),
+            "get_weather_forecast": lambda **kwargs: get_weather_forecast_async(kwargs["location"], kwargs["date"]),
         }
 
-    def analyze(self, user_message, tools):
-
-        
-
-
+    async def analyze_async(self, user_message, tools):
+        """사용자 메시지를 분석하여 호출이 필요한 함수가 있는지 판단합니다."""
         try:
-
-
-            # --- 디버깅 코드 ---
-            print("---" * 20)
-            loaded_key = os.getenv("OPENAI_API_KEY")
-            print(f"현재 코드에서 사용 중인 API 키: [{loaded_key}]")
-            print("---" * 20)
-            # --- 여기까지 --- # <--- 추가 (2/2)
-
-
-
-
-            response = client.chat.completions.create(
-                model=self.model,
-                messages=[{"role": "user", "content": user_message}],
-                tools=tools,
-                tool_choice="auto",
-            )
+            with span("analyze"):
+                response = await async_client.chat.completions.create(
+                    model=self.model,
+                    messages=[{"role": "user", "content": user_message}],
+                    tools=tools,
+                    tool_choice="auto",
+                )
+            record_usage(response.usage)
             message = response.choices[0].message
             return message, message.model_dump()
         except Exception as e:
             raise ValueError(f"[analyze 오류입니다]:{e}")
 
-    def run(self, analyzed, analyzed_dict, context):
-        context.append(analyzed)
-        tool_call = analyzed_dict["tool_calls"][0]
+    def _tool_message(self, tool_call, func_response):
+        return {
+            "tool_call_id": tool_call["id"],
+            "role": "tool",
+            "name": tool_call["function"]["name"],
+            "content": str(func_response),
+        }
+
+    async def _call_tool_async(self, tool_call):
         function = tool_call["function"]
         func_name = function["name"]
-        func_to_call = self.available_functions[func_name]
         try:
+            func_to_call = self.available_async_functions[func_name]
             func_args = json.loads(function["arguments"])
-            func_response = func_to_call(**func_args)
-            context.append({
-                "tool_call_id": tool_call["id"],
-                "role": "tool",
-                "name": func_name,
-                "content": str(func_response),
-            })
-            return client.chat.completions.create(model=self.model, messages=context).model_dump()
+            return await asyncio.wait_for(func_to_call(**func_args), TOOL_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            return f"[{func_name} 응답 시간이 초과되었습니다]"
+        except Exception as e:
+            return f"[{func_name} 오류입니다]: {e}"
+
+    async def _call_tools_async(self, analyzed, analyzed_dict, context):
+        """요청된 모든 함수를 asyncio.gather로 동시에 실행하고, 결과를 요청 순서대로 context에 추가합니다."""
+        context.append(analyzed)
+        tool_calls = analyzed_dict["tool_calls"]
+        with span("tools"):
+            results = await asyncio.gather(*(self._call_tool_async(tool_call) for tool_call in tool_calls))
+        for tool_call, func_response in zip(tool_calls, results):
+            context.append(self._tool_message(tool_call, func_response))
+
+    async def run_async(self, analyzed, analyzed_dict, context, tools=None):
+        """
+        요청된 함수들을 실행하고 그 결과로 최종 답변을 생성합니다.
+        tools가 주어지면 모델이 추가 함수 호출을 요청하는 동안 MAX_TOOL_ROUNDS까지 반복합니다.
+        """
+        try:
+            for round_no in range(1, MAX_TOOL_ROUNDS + 1):
+                await self._call_tools_async(analyzed, analyzed_dict, context)
+                params = dict(model=self.model, messages=context)
+                if tools and round_no < MAX_TOOL_ROUNDS:
+                    params.update(tools=tools, tool_choice="auto")
+                with span("completion"):
+                    response = (await async_client.chat.completions.create(**params)).model_dump()
+                record_usage(response.get("usage"))
+                message = response["choices"][0]["message"]
+                if not message.get("tool_calls"):
+                    return response
+                analyzed = analyzed_dict = tool_call_message(message)
+            return response
+        except Exception as e:
+            return makeup_response(f"[run 오류입니다]: {e}")
+
+    async def run_stream(self, analyzed, analyzed_dict, context, tools=None) -> CompletionStream:
+        """
+        run_async의 스트리밍 버전입니다. 함수들을 실행한 뒤 최종 답변을 토큰 조각 단위로 내보내는 스트림을 반환합니다.
+        tools가 주어지면 반환된 스트림의 tool_calls로 다음 함수 호출 라운드를 이어갈 수 있습니다.
+        """
+        try:
+            await self._call_tools_async(analyzed, analyzed_dict, context)
         except Exception as e:
-            return client.makeup_response(f"[run 오류입니다]: {e}")
+            return CompletionStream.of(f"[run 오류입니다]: {e}")
+        params = dict(model=self.model, messages=context)
+        if tools:
+            params.update(tools=tools, tool_choice="auto")
+        return CompletionStream(error_message="[run 오류입니다]", **params)
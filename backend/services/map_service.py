@@ -1,9 +1,14 @@
 """
 JSON 파일을 기반으로 위치 및 전화번호 데이터를 불러오고 처리하는 서비스입니다.
+데이터는 애플리케이션 시작 시 한 번만 메모리에 적재하고, 파일이 바뀐 경우에만 다시 읽습니다.
 """
+import math
 import os
 import json
-from typing import List, Dict
+import threading
+from array import array
+from typing import List, Dict, Optional, Tuple
+from utils.spatial_index import GridIndex, ClusterHierarchy
 
 # 경로 설정
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -12,6 +17,12 @@ DATA_DIR = os.path.join(BASE_DIR, 'data')
 PARKS_JSON_PATH = os.path.join(DATA_DIR, '도시공원정보현황(제공표준).json')
 RESTAURANTS_JSON_PATH = os.path.join(DATA_DIR, '모범음식점현황.json')
 
+# 카카오맵 확대 수준(1: 가장 확대 ~ 14: 가장 축소)에 맞춘 클러스터 설정
+# level 1에서 1px은 약 0.25m이며, level이 1 오를 때마다 2배가 됩니다.
+MAP_MAX_LEVEL = 14
+CLUSTER_CELL_PX = 64
+CLUSTER_BASE_CELL_DEG = CLUSTER_CELL_PX * 0.25 / 111320
+
 def load_json_data(file_path: str, name_key: str, lat_key: str, lng_key: str, tel_key: str) -> List[Dict]:
     """
     JSON 파일을 불러와 'tel' 키를 포함한 표준 형식으로 파싱하는 공통 함수입니다.
@@ -19,7 +30,7 @@ def load_json_data(file_path: str, name_key: str, lat_key: str, lng_key: str, te
     if not os.path.exists(file_path):
         print(f"오류: 다음 경로에 파일이 없습니다: {file_path}")
         return []
-    
+
     try:
         with open(file_path, 'r', encoding='utf-8') as f:
             data = json.load(f)
@@ -43,31 +54,233 @@ def load_json_data(file_path: str, name_key: str, lat_key: str, lng_key: str, te
                 except (ValueError, TypeError):
                     # 위도, 경도 값을 숫자로 변환할 수 없으면 해당 데이터를 건너뜁니다.
                     continue
-                    
+
         return processed_data
-        
+
     except Exception as e:
         print(f"JSON 파일 처리 중 오류 발생 {file_path}: {e}")
         return []
 
-def load_parks_data() -> List[Dict]:
-    """도시공원 JSON 파일에서 데이터를 읽어옵니다."""
-    # 공원 파일에 맞는 전화번호 키('MNGINST_TELNO')를 지정합니다.
-    return load_json_data(
-        PARKS_JSON_PATH, 
-        name_key='PARK_NM', 
-        lat_key='REFINE_WGS84_LAT', 
-        lng_key='REFINE_WGS84_LOGT',
-        tel_key='MNGINST_TELNO'
-    )
-
-def load_restaurants_data() -> List[Dict]:
-    """모범음식점 JSON 파일에서 데이터를 읽어옵니다."""
-    # 음식점 파일에 맞는 전화번호 키('TELNO')를 지정합니다.
-    return load_json_data(
-        RESTAURANTS_JSON_PATH, 
-        name_key='BIZEST_NM', 
-        lat_key='REFINE_WGS84_LAT', 
-        lng_key='REFINE_WGS84_LOGT',
-        tel_key='TELNO'
-    )
\ No newline at end of file
+
+class PlaceStore:
+    """
+    위치 데이터를 열(column) 단위로 메모리에 보관하는 저장소입니다.
+    이름/전화번호는 리스트, 위도/경도는 double 배열로 저장하며,
+    파일의 수정 시각(mtime)이 바뀐 경우에만 JSON을 다시 파싱합니다.
+    """
+    def __init__(self, file_path: str, name_key: str, lat_key: str, lng_key: str, tel_key: str):
+        self.file_path = file_path
+        self.keys = dict(name_key=name_key, lat_key=lat_key, lng_key=lng_key, tel_key=tel_key)
+        self.names: List[str] = []
+        self.tels: List[Optional[str]] = []
+        self.lats = array('d')
+        self.lngs = array('d')
+        # 데이터가 다시 적재될 때마다 증가하며, 파생 캐시(공간 인덱스 등)의 무효화에 사용합니다.
+        self.version = 0
+        self._mtime: Optional[float] = None
+        self._lock = threading.Lock()
+        self._index: Optional[GridIndex] = None
+        self._index_version = -1
+        self._clusters: Optional[ClusterHierarchy] = None
+        self._clusters_version = -1
+        self._json: Optional[bytes] = None
+        self._json_version = -1
+
+    def __len__(self):
+        self.ensure_loaded()
+        return len(self.names)
+
+    def _current_mtime(self) -> Optional[float]:
+        try:
+            return os.stat(self.file_path).st_mtime
+        except OSError:
+            return None
+
+    def ensure_loaded(self) -> None:
+        """파일이 처음 요청되었거나 변경되었으면 다시 적재합니다."""
+        mtime = self._current_mtime()
+        if mtime is not None and mtime == self._mtime:
+            return
+        with self._lock:
+            # 다른 스레드가 먼저 적재를 마쳤을 수 있으므로 한 번 더 확인합니다.
+            if mtime is not None and mtime == self._mtime:
+                return
+            records = load_json_data(self.file_path, **self.keys)
+            names, tels, lats, lngs = [], [], array('d'), array('d')
+            for record in records:
+                names.append(record['name'])
+                tels.append(record['tel'])
+                lats.append(record['lat'])
+                lngs.append(record['lng'])
+            self.names, self.tels, self.lats, self.lngs = names, tels, lats, lngs
+            self._mtime = mtime
+            self.version += 1
+
+    @property
+    def index(self) -> GridIndex:
+        """현재 데이터에 대한 공간 인덱스를 반환합니다. 데이터가 다시 적재되면 새로 만듭니다."""
+        self.ensure_loaded()
+        if self._index is None or self._index_version != self.version:
+            with self._lock:
+                if self._index is None or self._index_version != self.version:
+                    self._index = GridIndex(self.lats, self.lngs)
+                    self._index_version = self.version
+        return self._index
+
+    @property
+    def clusters(self) -> ClusterHierarchy:
+        """확대 수준별로 미리 계산된 클러스터를 반환합니다. 데이터가 다시 적재되면 새로 만듭니다."""
+        self.ensure_loaded()
+        if self._clusters is None or self._clusters_version != self.version:
+            with self._lock:
+                if self._clusters is None or self._clusters_version != self.version:
+                    self._clusters = ClusterHierarchy(self.lats, self.lngs, CLUSTER_BASE_CELL_DEG, MAP_MAX_LEVEL)
+                    self._clusters_version = self.version
+        return self._clusters
+
+    def record(self, idx: int) -> Dict:
+        """idx 번째 위치를 API 응답 형식의 dict로 반환합니다."""
+        return {'name': self.names[idx], 'lat': self.lats[idx], 'lng': self.lngs[idx], 'tel': self.tels[idx]}
+
+    def records(self, indices=None) -> List[Dict]:
+        """지정한 인덱스(기본값: 전체)의 위치 목록을 반환합니다."""
+        self.ensure_loaded()
+        if indices is None:
+            indices = range(len(self.names))
+        return [self.record(i) for i in indices]
+
+    def records_json(self) -> bytes:
+        """
+        전체 위치 목록을 JSON으로 직렬화한 결과를 반환합니다.
+        전체 목록은 요청마다 같으므로 데이터가 다시 적재되었을 때만 새로 만듭니다.
+        """
+        self.ensure_loaded()
+        version = self.version
+        if self._json is None or self._json_version != version:
+            names, lats, lngs, tels = self.names, self.lats, self.lngs, self.tels
+            payload = json.dumps(
+                [{'name': n, 'lat': lat, 'lng': lng, 'tel': t} for n, lat, lng, t in zip(names, lats, lngs, tels)],
+                ensure_ascii=False,
+            ).encode('utf-8')
+            with self._lock:
+                self._json, self._json_version = payload, version
+        return self._json
+
+
+# 공원 파일에 맞는 전화번호 키('MNGINST_TELNO')를 지정합니다.
+parks_store = PlaceStore(
+    PARKS_JSON_PATH,
+    name_key='PARK_NM',
+    lat_key='REFINE_WGS84_LAT',
+    lng_key='REFINE_WGS84_LOGT',
+    tel_key='MNGINST_TELNO'
+)
+
+# 음식점 파일에 맞는 전화번호 키('TELNO')를 지정합니다.
+restaurants_store = PlaceStore(
+    RESTAURANTS_JSON_PATH,
+    name_key='BIZEST_NM',
+    lat_key='REFINE_WGS84_LAT',
+    lng_key='REFINE_WGS84_LOGT',
+    tel_key='TELNO'
+)
+
+
+stores = {
+    'parks': parks_store,
+    'restaurants': restaurants_store,
+}
+
+
+def preload() -> None:
+    """애플리케이션 시작 시 모든 위치 데이터와 공간 인덱스를 미리 메모리에 적재합니다."""
+    for store in stores.values():
+        store.index
+        store.clusters
+
+
+def get_store(kind: str) -> PlaceStore:
+    """종류('parks', 'restaurants')에 해당하는 저장소를 반환합니다."""
+    if kind not in stores:
+        raise ValueError(f"지원하지 않는 위치 종류입니다: {kind}")
+    return stores[kind]
+
+
+def parse_bbox(bbox: str) -> Tuple[float, float, float, float]:
+    """
+    'south,west,north,east' 형식의 문자열을 (남, 서, 북, 동) 좌표로 변환합니다.
+    """
+    try:
+        south, west, north, east = (float(v) for v in bbox.split(','))
+    except ValueError:
+        raise ValueError("bbox는 'south,west,north,east' 형식이어야 합니다.")
+    # inf/nan이나 범위를 벗어난 좌표는 격자 셀 계산(math.floor)에서 오류가 나므로 미리 거부합니다.
+    if not all(math.isfinite(v) for v in (south, west, north, east)):
+        raise ValueError("bbox 좌표는 유한한 숫자여야 합니다.")
+    if not (-90 <= south <= 90 and -90 <= north <= 90 and -180 <= west <= 180 and -180 <= east <= 180):
+        raise ValueError("bbox 좌표가 위도(-90~90)/경도(-180~180) 범위를 벗어났습니다.")
+    if south > north or west > east:
+        raise ValueError("bbox의 남/서 좌표는 북/동 좌표보다 작아야 합니다.")
+    return south, west, north, east
+
+
+def query_bbox(kind: str, bbox: Tuple[float, float, float, float]) -> List[Dict]:
+    """영역 안에 있는 위치 목록을 반환합니다."""
+    store = get_store(kind)
+    return store.records(store.index.query_bbox(*bbox))
+
+
+def query_nearby(kind: str, lat: float, lng: float, radius_m: float, limit: Optional[int] = None) -> List[Dict]:
+    """중심 좌표에서 반경 안에 있는 위치 목록을 거리(distance_m)와 함께 가까운 순으로 반환합니다."""
+    store = get_store(kind)
+    hits = store.index.query_radius(lat, lng, radius_m)
+    if limit is not None:
+        hits = hits[:limit]
+    return [dict(store.record(idx), distance_m=round(dist, 1)) for idx, dist in hits]
+
+
+def query_clusters(kind: str, level: int, bbox: Tuple[float, float, float, float]) -> List[Dict]:
+    """
+    확대 수준(level)에 맞게 묶인 클러스터 목록을 반환합니다.
+    각 클러스터는 중심 좌표, 개수, 대표 위치의 이름/전화번호를 가집니다.
+    가장 확대한 level 1에서는 더 확대할 수 없으므로 개별 위치를 반환하고,
+    좌표가 같은 위치만 places 목록을 가진 클러스터로 묶습니다.
+    """
+    store = get_store(kind)
+    if level == 1:
+        return _same_position_groups(store, bbox)
+    result = []
+    for cluster in store.clusters.query(level, *bbox):
+        rep = store.record(cluster.rep)
+        if cluster.count == 1:
+            result.append(dict(rep, count=1))
+        else:
+            result.append({
+                'name': rep['name'],
+                'lat': cluster.lat,
+                'lng': cluster.lng,
+                'tel': rep['tel'],
+                'count': cluster.count,
+            })
+    return result
+
+
+def _same_position_groups(store: PlaceStore, bbox: Tuple[float, float, float, float]) -> List[Dict]:
+    """영역 안의 위치를 좌표가 같은 것끼리 묶어 반환합니다."""
+    groups: Dict[Tuple[float, float], List[Dict]] = {}
+    for record in store.records(store.index.query_bbox(*bbox)):
+        groups.setdefault((record['lat'], record['lng']), []).append(record)
+    result = []
+    for (lat, lng), records in groups.items():
+        if len(records) == 1:
+            result.append(dict(records[0], count=1))
+        else:
+            result.append({
+                'name': records[0]['name'],
+                'lat': lat,
+                'lng': lng,
+                'tel': records[0]['tel'],
+                'count': len(records),
+                'places': records,
+            })
+    return result
@@ -1,19 +1,49 @@
 """
 인터넷 검색 API 함수를 제공합니다.
-Tavily API를 사용하여 실시간 정보를 검색합니다.
+Tavily API를 사용하여 실시간 정보를 검색하며, 같은 검색어의 결과는 캐시에서 바로 반환합니다.
 """
-import requests
-from config import TAVILY_API_KEY
+import asyncio
+from config import TAVILY_API_KEY, SEARCH_CACHE_TTL_SECONDS, SEARCH_CACHE_MAXSIZE, SEARCH_CACHE_DB_PATH
+from common import http_client
+from common.cache import TTLCache, SQLiteStore, normalize_key
 
-def search_internet(search_query):
-    url = "https://api.tavily.com/search"
+TAVILY_SEARCH_URL = "https://api.tavily.com/search"
+
+# 정규화된 검색어 -> 검색 결과(answer) 캐시
+search_cache = TTLCache(maxsize=SEARCH_CACHE_MAXSIZE, ttl=SEARCH_CACHE_TTL_SECONDS)
+# 재시작 후에도 유지되는 2차 캐시 (SEARCH_CACHE_DB_PATH가 설정된 경우에만 사용)
+search_store = SQLiteStore(SEARCH_CACHE_DB_PATH, table="search_cache") if SEARCH_CACHE_DB_PATH else None
+
+def _request_args(search_query):
     headers = {"Authorization": f"Bearer {TAVILY_API_KEY}"}
     data = {"query": search_query, "include_answer": True}
+    return {"json": data, "headers": headers}
+
+async def _fetch_async(search_query, key):
+    # SQLite 접근은 파일 입출력이므로 이벤트 루프를 막지 않도록 별도 스레드에서 실행합니다.
+    if search_store is not None:
+        answer = await asyncio.to_thread(search_store.get, key)
+        if answer is not None:
+            return answer
+    response = await http_client.apost(TAVILY_SEARCH_URL, **_request_args(search_query))
+    response.raise_for_status()
+    answer = response.json().get("answer", "검색 결과를 찾을 수 없습니다.")
+    if search_store is not None:
+        await asyncio.to_thread(search_store.set, key, answer, SEARCH_CACHE_TTL_SECONDS)
+    return answer
+
+async def search_internet_async(search_query):
+    """검색어를 정규화한 키로 캐시를 먼저 확인하고, 없으면 Tavily API로 검색합니다."""
+    key = normalize_key(search_query)
     try:
-        response = requests.post(url, json=data, headers=headers)
-        response.raise_for_status()
-        result = response.json()
-        return result.get("answer", "검색 결과를 찾을 수 없습니다.")
+        return await search_cache.get_or_fetch_async(key, lambda: _fetch_async(search_query, key))
     except Exception as e:
         print(f"Tavily API error: {e}")
-        return "[인터넷 검색 중 오류가 발생했습니다]"
\ No newline at end of file
+        return "[인터넷 검색 중 오류가 발생했습니다]"
+
+def search_cache_stats():
+    """검색 캐시의 적중률 통계를 반환합니다."""
+    stats = {"memory": search_cache.stats()}
+    if search_store is not None:
+        stats["sqlite"] = search_store.stats()
+    return stats
@@ -2,33 +2,97 @@
 날씨 정보 및 예보 API 함수를 제공합니다.
 Open-Meteo API를 사용하여 실시간/미래 날씨 데이터를 조회합니다.
 """
-import requests
+import asyncio
+import math
+from array import array
 from collections import Counter
-from constants.constants import seoul_keywords, gyeonggi_keywords, weather_map, global_lat_lon
+from constants.constants import weather_map, global_lat_lon
+from common import http_client
+from common.cache import TTLCache
+from utils.keyword_matcher import representative_location
+from config import (
+    WEATHER_CURRENT_TTL_SECONDS, WEATHER_FORECAST_TTL_SECONDS, WEATHER_FORECAST_DAYS,
+    WEATHER_PREFETCH_INTERVAL_SECONDS,
+)
 
-def get_weather_forecast(location, date):
+# (종류, 지역, 날짜) -> 날씨 조회 결과 캐시. 정상 조회 결과(dict)만 저장합니다.
+weather_cache = TTLCache(maxsize=2048)
+
+def _is_result(value):
+    return isinstance(value, dict)
+
+def _is_window(value):
+    return isinstance(value, ForecastWindow)
+
+
+class ForecastWindow:
+    """
+    한 지역의 여러 날짜에 걸친 시간별 예보를 압축 배열로 보관합니다.
+    기온은 double 배열(결측값은 NaN), 날씨 코드는 short 배열(결측값은 -1)로 저장하고,
+    날짜별 시작/끝 위치만 따로 기록합니다.
+    """
+    __slots__ = ("temps", "codes", "days")
+
+    def __init__(self, times, temps, codes):
+        self.temps = array('d', (math.nan if t is None else t for t in temps))
+        self.codes = array('h', (-1 if c is None else c for c in codes))
+        self.days = {}
+        for idx, time_str in enumerate(times):
+            day = time_str[:10]
+            start, _ = self.days.get(day, (idx, idx))
+            self.days[day] = (start, idx + 1)
+
+    def __contains__(self, date):
+        return date in self.days
+
+    def summary(self, location, date):
+        """date의 최고기온과 대표 날씨를 _parse_forecast와 같은 형식으로 반환합니다."""
+        start, end = self.days[date]
+        temps = [t for t in self.temps[start:end] if not math.isnan(t)]
+        codes = [c for c in self.codes[start:end] if c >= 0]
+        max_temp = max(temps) if temps else None
+        main_code = Counter(codes).most_common(1)[0][0] if codes else None
+        return {
+            "date": date,
+            "location": location,
+            "max_temperature": max_temp,
+            "weather": weather_map.get(main_code, "정보 없음"),
+        }
+
+def _resolve_location(location):
+    """지역명을 (위도/경도, 대표 지역명)으로 변환합니다. 찾을 수 없으면 (None, location)을 반환합니다."""
     lat_lon = global_lat_lon.get(location)
     if not lat_lon:
-        if any(k in location for k in seoul_keywords):
-            lat_lon, location = global_lat_lon.get("서울"), "서울"
-        elif any(k in location for k in gyeonggi_keywords):
-            lat_lon, location = global_lat_lon.get("경기도"), "경기도"
-        else:
-            return f"[{location}의 위치 정보를 찾을 수 없습니다.]"
-    
-    lat, lon = lat_lon
-    url = f"https://api.open-meteo.com/v1/forecast?latitude={lat}&longitude={lon}&hourly=temperature_2m,weathercode&timezone=Asia%2FSeoul&start_date={date}&end_date={date}"
-    response = requests.get(url)
-    data = response.json()
+        # '강남' -> '서울', '수원' -> '경기도'처럼 세부 지역 키워드를 대표 지역으로 바꿉니다.
+        representative = representative_location(location)
+        if representative:
+            lat_lon, location = global_lat_lon.get(representative), representative
+    return lat_lon, location
+
+def _forecast_url(lat, lon, date):
+    return f"https://api.open-meteo.com/v1/forecast?latitude={lat}&longitude={lon}&hourly=temperature_2m,weathercode&timezone=Asia%2FSeoul&start_date={date}&end_date={date}"
+
+def _forecast_window_url(lat, lon):
+    return f"https://api.open-meteo.com/v1/forecast?latitude={lat}&longitude={lon}&hourly=temperature_2m,weathercode&timezone=Asia%2FSeoul&forecast_days={WEATHER_FORECAST_DAYS}"
+
+def _parse_forecast_window(data):
+    if "hourly" not in data:
+        return None
+    hourly = data["hourly"]
+    return ForecastWindow(hourly["time"], hourly["temperature_2m"], hourly["weathercode"])
+
+def _current_url(lat, lon):
+    return f"https://api.open-meteo.com/v1/forecast?latitude={lat}&longitude={lon}&current_weather=true"
 
+def _parse_forecast(data, location, date):
     if "hourly" not in data:
         return f"[{date} {location}의 날씨 예보 데이터를 찾을 수 없습니다.]"
-    
+
     temps = data["hourly"]["temperature_2m"]
     codes = data["hourly"]["weathercode"]
     max_temp = max(temps) if temps else None
     main_code = Counter(codes).most_common(1)[0][0] if codes else None
-    
+
     return {
         "date": date,
         "location": location,
@@ -36,22 +100,84 @@ def get_weather_forecast(location, date):
         "weather": weather_map.get(main_code, "정보 없음"),
     }
 
-def get_celsius_temperature(location):
-    lat_lon = global_lat_lon.get(location)
-    if not lat_lon:
-        if any(k in location for k in seoul_keywords):
-            lat_lon, location = global_lat_lon.get("서울"), "서울"
-        elif any(k in location for k in gyeonggi_keywords):
-            lat_lon, location = global_lat_lon.get("경기도"), "경기도"
-        else:
-            return None
-            
-    lat, lon = lat_lon
-    url = f"https://api.open-meteo.com/v1/forecast?latitude={lat}&longitude={lon}&current_weather=true"
-    response = requests.get(url)
-    data = response.json()["current_weather"]
-    
+def _parse_current(data):
+    data = data["current_weather"]
     return {
         "temperature": data["temperature"],
         "weather": weather_map.get(data.get("weathercode"), "정보 없음"),
     }
+
+async def get_weather_forecast_async(location, date):
+    """date의 최고기온과 대표 날씨를 반환합니다. 위치를 찾을 수 없거나 예보가 없으면 안내 문자열을 반환합니다."""
+    lat_lon, location = _resolve_location(location)
+    if not lat_lon:
+        return f"[{location}의 위치 정보를 찾을 수 없습니다.]"
+
+    lat, lon = lat_lon
+    # 여러 날짜의 예보를 한 번에 받아 두고, 그 기간 안의 날짜는 추가 호출 없이 응답합니다.
+    async def fetch_window():
+        response = await http_client.aget(_forecast_window_url(lat, lon))
+        return _parse_forecast_window(response.json())
+    window = await weather_cache.get_or_fetch_async(("forecast_window", location), fetch_window, WEATHER_FORECAST_TTL_SECONDS, _is_window)
+    if window is not None and date in window:
+        return window.summary(location, date)
+
+    # 예보 기간을 벗어난 날짜는 해당 날짜만 따로 조회합니다.
+    async def fetch():
+        response = await http_client.aget(_forecast_url(lat, lon, date))
+        return _parse_forecast(response.json(), location, date)
+    return await weather_cache.get_or_fetch_async(("forecast", location, date), fetch, WEATHER_FORECAST_TTL_SECONDS, _is_result)
+
+async def get_celsius_temperature_async(location):
+    """현재 기온과 날씨를 반환합니다. 위치를 찾을 수 없으면 None을 반환합니다."""
+    lat_lon, location = _resolve_location(location)
+    if not lat_lon:
+        return None
+
+    lat, lon = lat_lon
+    async def fetch():
+        response = await http_client.aget(_current_url(lat, lon))
+        return _parse_current(response.json())
+    return await weather_cache.get_or_fetch_async(("current", location), fetch, WEATHER_CURRENT_TTL_SECONDS, _is_result)
+
+def weather_cache_stats():
+    """날씨 캐시의 적중/실패 통계를 반환합니다."""
+    return weather_cache.stats()
+
+def _prefetch_url(locations):
+    lats = ",".join(str(global_lat_lon[name][0]) for name in locations)
+    lons = ",".join(str(global_lat_lon[name][1]) for name in locations)
+    return (
+        f"https://api.open-meteo.com/v1/forecast?latitude={lats}&longitude={lons}"
+        f"&current_weather=true&hourly=temperature_2m,weathercode&timezone=Asia%2FSeoul&forecast_days={WEATHER_FORECAST_DAYS}"
+    )
+
+async def prefetch_all(interval=WEATHER_PREFETCH_INTERVAL_SECONDS):
+    """
+    global_lat_lon의 모든 지역에 대해 현재 날씨와 예보를 한 번의 다중 좌표 요청으로 받아 캐시에 채웁니다.
+    다음 갱신이 한 번 실패해도 데이터가 남아 있도록 갱신 주기의 2배 동안 유지합니다.
+    """
+    locations = list(global_lat_lon)
+    response = await http_client.aget(_prefetch_url(locations))
+    response.raise_for_status()
+    data = response.json()
+    # 좌표가 여러 개이면 Open-Meteo는 요청 순서대로 결과 목록을 반환합니다.
+    results = data if isinstance(data, list) else [data]
+    ttl = interval * 2
+    for location, result in zip(locations, results):
+        if "current_weather" in result:
+            weather_cache.set(("current", location), _parse_current(result), ttl)
+        window = _parse_forecast_window(result)
+        if window is not None:
+            weather_cache.set(("forecast_window", location), window, ttl)
+    return len(results)
+
+async def run_prefetcher(interval=WEATHER_PREFETCH_INTERVAL_SECONDS):
+    """애플리케이션이 실행되는 동안 일정 주기로 prefetch_all을 반복합니다."""
+    while True:
+        try:
+            count = await prefetch_all(interval)
+            print(f"날씨 미리 받기 완료: {count}개 지역")
+        except Exception as e:
+            print(f"날씨 미리 받기 오류: {e}")
+        await asyncio.sleep(interval)
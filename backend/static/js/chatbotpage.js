@@ -5,6 +5,9 @@ let currentUserPreference = null;
 let sidebarMapInstance = null;
 let sidebarMapMarkers = [];
 let sidebarMapInfowindows = [];
+let sidebarMapType = null;
+// 진행 중인 사이드바 지도 마커 요청. 새 요청을 보내면 이전 요청을 취소합니다.
+let sidebarMapRequest = null;
 
 
 // =================================================================
@@ -51,6 +54,7 @@ function setupUserAndLogout() {
     // 로그아웃 버튼 클릭 이벤트 리스너를 추가합니다.
     logoutBtn.addEventListener('click', () => {
         localStorage.removeItem('smartday_user');
+        sessionStorage.removeItem('smartday_chat_session');
         window.location.href = '/login'; // 로그인 페이지로 이동
     });
 
@@ -207,6 +211,10 @@ function initializeSidebarMap() {
             const mapOption = { center: new kakao.maps.LatLng(37.566826, 126.9786567), level: 7 };
             sidebarMapInstance = new kakao.maps.Map(mapContainer, mapOption);
             sidebarMapInstance.addControl(new kakao.maps.ZoomControl(), kakao.maps.ControlPosition.RIGHT);
+            // 지도 이동/확대가 끝나면 현재 화면 영역의 마커만 다시 불러옵니다.
+            kakao.maps.event.addListener(sidebarMapInstance, 'idle', () => {
+                if (sidebarMapType) loadSidebarMapMarkers(sidebarMapType);
+            });
             loadSidebarMapMarkers('parks', document.querySelector('#sidebar-map-controls button'));
 
         } catch (error) {
@@ -218,28 +226,68 @@ function initializeSidebarMap() {
 async function loadSidebarMapMarkers(type, clickedButton) {
     if (!sidebarMapInstance) return;
 
-    document.querySelectorAll('#sidebar-map-controls button').forEach(btn => btn.classList.remove('active'));
-    if (clickedButton) clickedButton.classList.add('active');
+    if (clickedButton) {
+        document.querySelectorAll('#sidebar-map-controls button').forEach(btn => btn.classList.remove('active'));
+        clickedButton.classList.add('active');
+    }
+    sidebarMapType = type;
 
-    sidebarMapMarkers.forEach(marker => marker.setMap(null));
-    sidebarMapInfowindows.forEach(infowindow => infowindow.close());
-    sidebarMapMarkers = [];
-    sidebarMapInfowindows = [];
+    if (sidebarMapRequest) sidebarMapRequest.abort();
+    const request = sidebarMapRequest = new AbortController();
 
-    const apiUrl = `http://127.0.0.1:8000/map/${type}`;
+    // 현재 지도 화면 영역(south,west,north,east)의 데이터만 요청합니다.
+    const bounds = sidebarMapInstance.getBounds();
+    const sw = bounds.getSouthWest();
+    const ne = bounds.getNorthEast();
+    const bbox = [sw.getLat(), sw.getLng(), ne.getLat(), ne.getLng()].join(',');
+    const level = sidebarMapInstance.getLevel();
+    const apiUrl = `http://127.0.0.1:8000/map/clusters?kind=${type}&level=${level}&bbox=${bbox}`;
 
     try {
-        const response = await fetch(apiUrl);
+        const response = await fetch(apiUrl, { signal: request.signal });
         if (!response.ok) throw new Error(`HTTP error! status: ${response.status}`);
         
         const data = await response.json();
+
+        // 가장 최근 요청의 응답이 도착했을 때만 기존 마커를 지우고 다시 그립니다.
+        sidebarMapMarkers.forEach(marker => marker.setMap(null));
+        sidebarMapInfowindows.forEach(infowindow => infowindow.close());
+        sidebarMapMarkers = [];
+        sidebarMapInfowindows = [];
+
         if (!data || data.length === 0) {
-            alert('표시할 데이터가 없습니다.');
-            if (clickedButton) clickedButton.classList.remove('active');
+            // 지도 이동 중에는 현재 영역에 데이터가 없을 수 있으므로 버튼 클릭 시에만 안내합니다.
+            if (clickedButton) {
+                alert('표시할 데이터가 없습니다.');
+                clickedButton.classList.remove('active');
+                sidebarMapType = null;
+            }
             return;
         }
         
         data.forEach(item => {
+            // 여러 위치가 묶인 클러스터는 개수만 표시하고, 클릭하면 한 단계 확대합니다.
+            if (item.count > 1) {
+                const position = new kakao.maps.LatLng(item.lat, item.lng);
+                const el = document.createElement('div');
+                el.className = 'cluster-marker';
+                el.title = `${item.name} 외 ${item.count - 1}곳`;
+                el.textContent = item.count;
+                if (item.places) {
+                    // 좌표가 같아 더 확대해도 나눌 수 없는 위치들은 클릭하면 목록으로 보여줍니다.
+                    const list = item.places.map(place => `<div><strong>${place.name}</strong>전화: ${place.tel || '정보 없음'}</div>`).join('');
+                    const infowindow = new kakao.maps.InfoWindow({ position: position, content: `<div class="infowindow-content">${list}</div>`, removable: true });
+                    el.addEventListener('click', () => infowindow.open(sidebarMapInstance));
+                    sidebarMapInfowindows.push(infowindow);
+                } else {
+                    el.addEventListener('click', () => sidebarMapInstance.setLevel(level - 1, { anchor: position }));
+                }
+                const overlay = new kakao.maps.CustomOverlay({ position: position, content: el });
+                overlay.setMap(sidebarMapInstance);
+                sidebarMapMarkers.push(overlay);
+                return;
+            }
+
             const marker = new kakao.maps.Marker({ position: new kakao.maps.LatLng(item.lat, item.lng) });
             const content = `<div class="infowindow-content"><strong>${item.name}</strong>전화: ${item.tel || '정보 없음'}</div>`;
             const infowindow = new kakao.maps.InfoWindow({ content: content, disableAutoPan: true });
@@ -253,6 +301,8 @@ async function loadSidebarMapMarkers(type, clickedButton) {
         });
 
     } catch (error) {
+        // 더 새로운 요청으로 대체되어 취소된 요청은 무시합니다.
+        if (error.name === 'AbortError') return;
         console.error('마커 데이터를 불러오는 중 오류 발생:', error);
         alert('데이터를 불러오는 중 오류가 발생했습니다. 백엔드 서버가 실행 중인지 확인해주세요.');
         if (clickedButton) clickedButton.classList.remove('active');
@@ -275,10 +325,12 @@ async function sendMessage(event) {
     try {
         const payload = {
             request_message: message,
-            preference: currentUserPreference
+            preference: currentUserPreference,
+            session_id: sessionStorage.getItem('smartday_chat_session')
         };
 
-        const response = await fetch('http://127.0.0.1:8000/chatbot/chat-api', {
+        // 답변을 Server-Sent Events로 받아 도착하는 대로 화면에 표시합니다.
+        const response = await fetch('http://127.0.0.1:8000/chatbot/chat-api/stream', {
             method: 'POST',
             headers: { 'Content-Type': 'application/json' },
             body: JSON.stringify(payload)
@@ -288,9 +340,24 @@ async function sendMessage(event) {
             const errorText = await response.text();
             throw new Error(`Server response error: ${errorText}`);
         }
-        
-        const data = await response.json();
-        appendMessage(data.response_message, 'bot');
+
+        const botParagraph = appendMessage('', 'bot');
+        let botText = '';
+        await readEventStream(response, (event, data) => {
+            if (event === 'session') {
+                // 서버가 발급한 세션 ID를 저장해 다음 메시지에서 같은 대화를 이어갑니다.
+                sessionStorage.setItem('smartday_chat_session', data.session_id);
+            } else if (event === 'delta') {
+                botText += data.text;
+                updateMessage(botParagraph, botText);
+            } else if (event === 'done') {
+                updateMessage(botParagraph, data.response_message);
+            } else if (event === 'error') {
+                // 답변 생성 중 서버에서 오류가 나면 지금까지 받은 내용 뒤에 안내 문구를 표시합니다.
+                botText += (botText ? ' ' : '') + data.message;
+                updateMessage(botParagraph, botText);
+            }
+        });
 
     } catch (error) {
         console.error('An error occurred:', error);
@@ -298,6 +365,39 @@ async function sendMessage(event) {
     }
 }
 
+// fetch 응답 본문을 Server-Sent Events 형식으로 읽어 이벤트마다 onEvent(event, data)를 호출합니다.
+async function readEventStream(response, onEvent) {
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+
+        let boundary;
+        while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+            const rawEvent = buffer.slice(0, boundary);
+            buffer = buffer.slice(boundary + 2);
+
+            let event = 'message';
+            let data = '';
+            rawEvent.split('\n').forEach(line => {
+                if (line.startsWith('event: ')) event = line.slice(7);
+                else if (line.startsWith('data: ')) data += line.slice(6);
+            });
+            if (data) onEvent(event, JSON.parse(data));
+        }
+    }
+}
+
+function updateMessage(paragraph, text) {
+    paragraph.innerHTML = text;
+    const chatBox = document.getElementById('chat-box');
+    chatBox.scrollTop = chatBox.scrollHeight;
+}
+
 function appendMessage(text, sender) {
     const chatBox = document.getElementById('chat-box');
     const messageDiv = document.createElement('div');
@@ -305,6 +405,7 @@ function appendMessage(text, sender) {
     messageDiv.innerHTML = `<p>${text}</p>`;
     chatBox.appendChild(messageDiv);
     chatBox.scrollTop = chatBox.scrollHeight;
+    return messageDiv.querySelector('p');
 }
 
 // 맨 아래에 있던 중복된 setupUserAndLogout 함수는 여기서 완전히 제거되었습니다.
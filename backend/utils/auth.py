@@ -1,30 +1,160 @@
+import hashlib
+import heapq
+import threading
+import time
 from datetime import datetime, timedelta
+from typing import NamedTuple
 from fastapi import Depends, HTTPException
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import jwt, JWTError
-from config import SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES
+from sqlalchemy.orm import Session
+from common.cache import TTLCache, SQLiteStore
+from database import get_db
+from models.user import User
+from config import (
+    SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES,
+    TOKEN_CACHE_MAXSIZE, TOKEN_BLACKLIST_DB_PATH, USER_CACHE_TTL_SECONDS, USER_CACHE_MAXSIZE,
+)
 
 bearer_scheme = HTTPBearer()
-blacklist_tokens = set()
 
 
-def create_access_token(data: dict, expires_delta: timedelta | None = None):
+class MemoryBlacklist:
+    """
+    프로세스 메모리에 보관하는 토큰 블랙리스트입니다. 토큰은 만료 시각까지만 보관하고,
+    추가할 때마다 만료된 토큰을 만료 시각 순서(heap)로 정리합니다.
+    """
+    def __init__(self):
+        self._expires = {}
+        self._heap = []
+        self._lock = threading.Lock()
+
+    def add(self, key: str, ttl: float) -> None:
+        expires_at = time.time() + ttl
+        with self._lock:
+            self._expires[key] = expires_at
+            heapq.heappush(self._heap, (expires_at, key))
+            now = time.time()
+            while self._heap and self._heap[0][0] <= now:
+                _, old = heapq.heappop(self._heap)
+                if self._expires.get(old, now + 1) <= now:
+                    del self._expires[old]
+
+    def __contains__(self, key: str) -> bool:
+        expires_at = self._expires.get(key)
+        return expires_at is not None and expires_at > time.time()
+
+    def __len__(self):
+        return len(self._expires)
+
+
+class SQLiteBlacklist:
+    """
+    SQLite 파일에 보관하는 토큰 블랙리스트입니다. 같은 파일을 사용하는 여러 uvicorn 워커가 블랙리스트를 공유합니다.
+    (Redis 등 외부 저장소로 바꿀 때도 add / in 두 연산만 구현하면 됩니다.)
+    """
+    def __init__(self, path: str):
+        self._store = SQLiteStore(path, table="token_blacklist")
+        self._adds = 0
+
+    def add(self, key: str, ttl: float) -> None:
+        self._store.set(key, True, ttl)
+        # 가끔씩 만료된 토큰을 정리합니다.
+        self._adds += 1
+        if self._adds % 100 == 0:
+            self._store.prune()
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._store
+
+
+# 로그아웃된 토큰 목록 (TOKEN_BLACKLIST_DB_PATH를 지정하면 워커 간에 공유)
+blacklist_tokens = SQLiteBlacklist(TOKEN_BLACKLIST_DB_PATH) if TOKEN_BLACKLIST_DB_PATH else MemoryBlacklist()
+# 서명 검증을 마친 토큰 -> claims. 토큰의 만료 시각(exp)까지만 보관합니다.
+verified_tokens = TTLCache(maxsize=TOKEN_CACHE_MAXSIZE)
+
+
+def _token_key(token: str) -> str:
+    """블랙리스트에는 토큰 원문 대신 해시를 저장합니다."""
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def create_access_token(data: dict, expires_delta: timedelta | None = None, user_id: int | None = None):
+    """
+    액세스 토큰을 발급합니다. user_id를 넘기면 토큰에 'uid'로 넣어 두어,
+    요청마다 이메일(sub)로 사용자를 조회하지 않고 바로 사용자 id를 얻을 수 있게 합니다.
+    """
     to_encode = data.copy()
+    if user_id is not None:
+        to_encode["uid"] = user_id
     expire = datetime.utcnow() + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
     to_encode.update({"exp": expire})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 
-def verify_token(token: HTTPAuthorizationCredentials = Depends(bearer_scheme)):
-    access_token = token.credentials
-    if access_token in blacklist_tokens:
+def decode_token(access_token: str) -> dict:
+    """
+    토큰을 검증하여 claims를 반환합니다. 한 번 검증한 토큰은 만료 시각까지 캐시에서 바로 반환합니다.
+    """
+    if _token_key(access_token) in blacklist_tokens:
         raise HTTPException(status_code=401, detail="로그아웃된 토큰입니다.")
+    payload = verified_tokens.get(access_token)
+    if payload is not None:
+        return payload
     try:
         payload = jwt.decode(access_token, SECRET_KEY, algorithms=[ALGORITHM])
-        return payload
     except JWTError:
         raise HTTPException(status_code=401, detail="유효하지 않은 토큰입니다.")
+    ttl = payload.get("exp", 0) - time.time()
+    if ttl > 0:
+        verified_tokens.set(access_token, payload, ttl)
+    return payload
+
+
+def verify_token(token: HTTPAuthorizationCredentials = Depends(bearer_scheme)):
+    return decode_token(token.credentials)
 
 
 def logout_token(token: str):
-    blacklist_tokens.add(token)
+    # 만료된 토큰은 어차피 거부되므로, 블랙리스트에는 남은 유효 시간 동안만 보관합니다.
+    try:
+        ttl = jwt.get_unverified_claims(token).get("exp", 0) - time.time()
+    except JWTError:
+        ttl = ACCESS_TOKEN_EXPIRE_MINUTES * 60
+    verified_tokens.delete(token)
+    if ttl > 0:
+        blacklist_tokens.add(_token_key(token), ttl)
+
+
+# --- 현재 사용자 의존성 ---
+class CurrentUser(NamedTuple):
+    """토큰의 사용자 정보입니다. 세션에 묶이지 않도록 ORM 객체 대신 필요한 값만 보관합니다."""
+    id: int
+    email: str
+    username: str
+
+
+# 이메일 -> CurrentUser. 전체 사용자 정보가 필요한 경우나 uid가 없는 이전 토큰을 위해 잠시 보관합니다.
+current_users = TTLCache(maxsize=USER_CACHE_MAXSIZE, ttl=USER_CACHE_TTL_SECONDS)
+
+
+def get_current_user(token_data: dict = Depends(verify_token), db: Session = Depends(get_db)) -> CurrentUser:
+    email = token_data["sub"]
+    user = current_users.get(email)
+    if user is None:
+        db_user = db.query(User).filter(User.email == email).first()
+        if not db_user:
+            raise HTTPException(status_code=404, detail="사용자를 찾을 수 없습니다.")
+        user = CurrentUser(db_user.id, db_user.email, db_user.username)
+        current_users.set(email, user)
+    return user
+
+
+def get_current_user_id(token_data: dict = Depends(verify_token), db: Session = Depends(get_db)) -> int:
+    """
+    현재 사용자의 id를 반환합니다. 토큰에 uid가 있으면 DB를 조회하지 않습니다.
+    """
+    user_id = token_data.get("uid")
+    if user_id is not None:
+        return user_id
+    return get_current_user(token_data, db).id
@@ -1,39 +1,124 @@
 """
 자연어 형태의 날짜 텍스트를 파싱하는 유틸리티 함수를 제공합니다.
+모든 표현을 하나의 정규식으로 미리 컴파일해 두고, 한 번의 검색으로 날짜 표현을 찾고 해석합니다.
 """
 import re
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
+from typing import NamedTuple, Optional
+
+WEEKDAY_MAP = {"월": 0, "화": 1, "수": 2, "목": 3, "금": 4, "토": 5, "일": 6}
+# 기준일로부터의 일수
+DAY_WORDS = {"그저께": -2, "그제": -2, "어제": -1, "오늘": 0, "내일": 1, "모레": 2, "글피": 3}
+COUNT_WORDS = {"하루": 1, "이틀": 2, "사흘": 3, "나흘": 4, "닷새": 5, "일주일": 7}
+# '이번/다음/다다음 주'의 주 단위 이동 값
+WEEK_SHIFTS = {"이번": 0, "다음": 1, "다다음": 2}
+
+# 같은 위치에서 여러 표현이 가능하면 앞쪽 대안을 우선하므로, 더 구체적인 표현을 먼저 둡니다.
+# '농담', '조금일'처럼 다른 단어 안에서 일치하지 않도록 단어 표현 앞에는 한글이 오지 않아야 하고,
+# '주'는 '주소', '주문'과 구분되도록 공백/끝/조사(에, 는)/'말'/요일이 뒤따라야 합니다.
+# '다음 토'처럼 '요일' 없이 요일을 쓰는 표현은 '주' 바로 뒤에서만 인정합니다. ('이번 일 끝나고' 등 제외)
+DATE_RE = re.compile(
+    r"""
+    (?<!\d)(?P<y>\d{4})[-./](?P<m>\d{1,2})[-./](?P<d>\d{1,2})(?!\d)
+    | (?:(?P<ky>\d{4})\s*년\s*)?(?<!\d)(?P<km>\d{1,2})\s*월\s*(?P<kd>\d{1,2})\s*일
+    | (?<!\d)(?P<n>\d{1,3})\s*(?P<unit>일|주)\s*(?:뒤|후)
+    | (?P<count>하루|이틀|사흘|나흘|닷새|일주일)\s*(?:뒤|후)
+    | (?<![가-힣])(?P<shift>다다음|이번|다음)\s*(?:주\s*)?
+        (?:(?P<weekend>주말)|(?P<weekday>[월화수목금토일])(?:요일|(?<=주[월화수목금토일])(?![가-힣])|(?<=주\s[월화수목금토일])(?![가-힣])))
+    | (?<![가-힣])(?P<week>다다음|이번|다음)\s*주(?=[에는]|(?![가-힣]))
+    | (?<![가-힣])(?P<word>그저께|그제|어제|오늘|내일|모레|글피)
+    | (?P<bare_weekend>주말)
+    | (?P<bare_weekday>[월화수목금토일])요일
+    """,
+    re.VERBOSE,
+)
+
+
+class DateRange(NamedTuple):
+    """메시지에서 찾은 날짜 표현과 그 기간(하루짜리 표현이면 start == end)입니다."""
+    text: str
+    start: date
+    end: date
+
+
+def _week_start(base: date, shift: int) -> date:
+    """base가 속한 주에서 shift 주 뒤의 월요일을 반환합니다."""
+    return base - timedelta(days=base.weekday()) + timedelta(weeks=shift)
+
+
+def _resolve(m: re.Match, base: date) -> Optional[tuple]:
+    """
+    정규식 일치 결과를 (시작일, 종료일)로 변환합니다. 존재하지 않는 날짜이면 None을 반환합니다.
+    어떤 표현과 일치했는지는 각 대안의 마지막 그룹 이름(m.lastgroup)으로 구분하여, 그룹을 하나씩 확인하지 않습니다.
+    """
+    kind = m.lastgroup
+    try:
+        if kind == "d":
+            day = date(int(m.group("y")), int(m.group("m")), int(m.group("d")))
+            return day, day
+        if kind == "kd":
+            year = int(m.group("ky")) if m.group("ky") else base.year
+            day = date(year, int(m.group("km")), int(m.group("kd")))
+            # 연도 없이 지난 날짜를 말하면 내년 날짜로 봅니다.
+            if not m.group("ky") and day < base:
+                day = date(year + 1, day.month, day.day)
+            return day, day
+    except ValueError:
+        return None
+    if kind == "unit":
+        days = int(m.group("n")) * (7 if m.group("unit") == "주" else 1)
+        day = base + timedelta(days=days)
+        return day, day
+    if kind == "count":
+        day = base + timedelta(days=COUNT_WORDS[m.group("count")])
+        return day, day
+    if kind == "weekend":
+        monday = _week_start(base, WEEK_SHIFTS[m.group("shift")])
+        saturday = monday + timedelta(days=5)
+        # 일요일에 '이번 주말'이라고 하면 오늘부터로 봅니다.
+        return max(saturday, base), monday + timedelta(days=6)
+    if kind == "weekday":
+        monday = _week_start(base, WEEK_SHIFTS[m.group("shift")])
+        day = monday + timedelta(days=WEEKDAY_MAP[m.group("weekday")])
+        return day, day
+    if kind == "week":
+        monday = _week_start(base, WEEK_SHIFTS[m.group("week")])
+        return max(monday, base), monday + timedelta(days=6)
+    if kind == "word":
+        day = base + timedelta(days=DAY_WORDS[m.group("word")])
+        return day, day
+    if kind == "bare_weekend":
+        monday = _week_start(base, 0)
+        return max(monday + timedelta(days=5), base), monday + timedelta(days=6)
+    # 요일만 말하면 오늘을 포함해 다가오는 그 요일로 봅니다.
+    day = base + timedelta(days=(WEEKDAY_MAP[m.group("bare_weekday")] - base.weekday()) % 7)
+    return day, day
+
+
+def _base_day(base_date) -> date:
+    if base_date is None:
+        return date.today()
+    return base_date.date() if isinstance(base_date, datetime) else base_date
+
+
+def _find_date(text: str, base: date) -> Optional[DateRange]:
+    for m in DATE_RE.finditer(text):
+        resolved = _resolve(m, base)
+        if resolved is not None:
+            return DateRange(m.group(0).strip(), *resolved)
+    return None
+
+
+def find_date(text, base_date=None) -> Optional[DateRange]:
+    """text에서 처음 등장하는 날짜 표현을 찾아 DateRange로 반환합니다. 없으면 None을 반환합니다."""
+    return _find_date(text, _base_day(base_date))
+
 
 def parse_natural_date(text, base_date=None):
     """
     '이번 주말', '내일' 등 자연어 날짜를 'YYYY-MM-DD' 형식으로 변환합니다.
+    기간 표현은 시작일을 반환하고, 날짜 표현이 없으면 기준일을 반환합니다.
     """
-    if base_date is None:
-        base_date = datetime.now()
-    text = text.strip()
-    weekday_map = {"월": 0, "화": 1, "수": 2, "목": 3, "금": 4, "토": 5, "일": 6}
-
-    if "내일" in text:
-        return (base_date + timedelta(days=1)).strftime("%Y-%m-%d")
-    if "모레" in text:
-        return (base_date + timedelta(days=2)).strftime("%Y-%m-%d")
-    if "이번 주말" in text or "주말" in text:
-        days_ahead = 5 - base_date.weekday()
-        if days_ahead < 0:
-            days_ahead += 7
-        return (base_date + timedelta(days_ahead)).strftime("%Y-%m-%d")
-    
-    m = re.search(r"다음주\s*([월화수목금토일])", text)
-    if m:
-        target_weekday = weekday_map[m.group(1)]
-        days_ahead = 7 - base_date.weekday() + target_weekday
-        return (base_date + timedelta(days_ahead)).strftime("%Y-%m-%d")
-    
-    m = re.search(r"\d{4}-\d{2}-\d{2}", text)
-    if m:
-        return m.group(0)
-        
-    if "오늘" in text:
-        return base_date.strftime("%Y-%m-%d")
-        
-    return base_date.strftime("%Y-%m-%d")
\ No newline at end of file
+    base = _base_day(base_date)
+    found = _find_date(text.strip(), base)
+    return (found.start if found else base).strftime("%Y-%m-%d")
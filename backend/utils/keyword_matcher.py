@@ -0,0 +1,146 @@
+"""
+여러 키워드를 한 번의 문자열 순회로 찾는 키워드 매처를 제공합니다.
+키워드를 트라이(trie)로 묶은 뒤 하나의 정규식으로 컴파일하여, 순회는 C로 구현된 정규식 엔진이 처리합니다.
+채팅 메시지에서 지역/날짜 표현을 추출할 때는 미리 만들어 둔 지역 매처와 날짜 정규식(DATE_RE)으로 각각 검색합니다.
+(두 정규식을 하나로 합치면 정규식 엔진이 첫 글자로 위치를 건너뛰는 최적화를 쓰지 못해 오히려 느려집니다.)
+"""
+import re
+from typing import Any, Dict, List, NamedTuple, Optional, Pattern, Tuple
+
+from constants.constants import seoul_keywords, gyeonggi_keywords, global_lat_lon
+from utils.date_parser import DateRange, find_date
+
+
+class KeywordMatch(NamedTuple):
+    start: int
+    end: int
+    keyword: str
+    value: Any
+
+
+def _trie_pattern(node: dict) -> str:
+    """트라이 노드를 정규식으로 변환합니다. 키워드가 끝나는 노드는 뒤따르는 부분을 선택(greedy)으로 두어 긴 키워드를 우선합니다."""
+    alternatives = [re.escape(ch) + _trie_pattern(child) for ch, child in sorted(node.items()) if ch != ""]
+    if not alternatives:
+        return ""
+    body = alternatives[0] if len(alternatives) == 1 else "(?:" + "|".join(alternatives) + ")"
+    return f"(?:{body})?" if "" in node else body
+
+
+class KeywordMatcher:
+    """
+    키워드 -> 값 매핑으로 만든 키워드 매처입니다.
+    겹치지 않는 키워드를 앞에서부터 찾고, 같은 위치에서는 가장 긴 키워드를 우선합니다.
+    같은 키워드를 여러 번 추가하면 처음 추가한 값을 유지합니다.
+    """
+    def __init__(self, keywords: Optional[Dict[str, Any]] = None):
+        self._trie: dict = {}
+        self._values: Dict[str, Any] = {}
+        self._regex: Optional[Pattern] = None
+        for keyword, value in (keywords or {}).items():
+            self.add(keyword, value)
+
+    def __len__(self):
+        return len(self._values)
+
+    def __contains__(self, keyword: str) -> bool:
+        return keyword in self._values
+
+    def add(self, keyword: str, value: Any = None) -> None:
+        if not keyword or keyword in self._values:
+            return
+        self._values[keyword] = keyword if value is None else value
+        node = self._trie
+        for ch in keyword:
+            node = node.setdefault(ch, {})
+        node[""] = True
+        self._regex = None
+
+    @property
+    def pattern(self) -> str:
+        """다른 정규식과 합쳐 사용할 수 있는 정규식 원문입니다."""
+        return _trie_pattern(self._trie)
+
+    @property
+    def regex(self) -> Pattern:
+        if self._regex is None:
+            # 키워드가 없으면 어떤 문자열과도 일치하지 않는 정규식을 사용합니다.
+            self._regex = re.compile(self.pattern or r"(?!)")
+        return self._regex
+
+    def value(self, keyword: str) -> Any:
+        return self._values[keyword]
+
+    def find_all(self, text: str) -> List[KeywordMatch]:
+        values = self._values
+        return [KeywordMatch(m.start(), m.end(), m.group(0), values[m.group(0)]) for m in self.regex.finditer(text)]
+
+    def first(self, text: str) -> Optional[KeywordMatch]:
+        m = self.regex.search(text)
+        return KeywordMatch(m.start(), m.end(), m.group(0), self._values[m.group(0)]) if m else None
+
+
+# --- 채팅 메시지의 지역/날짜 표현 추출 ---
+def _build_location_matcher() -> KeywordMatcher:
+    matcher = KeywordMatcher()
+    # 값은 날씨 조회에 사용할 대표 지역명입니다. '광주'처럼 겹치는 키워드는 global_lat_lon을 우선합니다.
+    for name in global_lat_lon:
+        matcher.add(name, name)
+    for name in seoul_keywords:
+        matcher.add(name, "서울")
+    for name in gyeonggi_keywords:
+        matcher.add(name, "경기도")
+    return matcher
+
+
+location_matcher = _build_location_matcher()
+
+
+def extract_mentions(text: str, base_date=None) -> Tuple[Optional[str], Optional[DateRange]]:
+    """
+    메시지에서 처음 등장하는 지역 키워드와 날짜 표현을 찾아 (지역, 날짜 기간)으로 반환합니다.
+    """
+    match = location_matcher.first(text)
+    return (match.keyword if match else None), find_date(text, base_date)
+
+
+def representative_location(text: str) -> Optional[str]:
+    """text에 포함된 지역 키워드의 대표 지역명(global_lat_lon의 키)을 반환합니다."""
+    match = location_matcher.first(text)
+    return match.value if match else None
+
+
+if __name__ == "__main__":
+    # 메시지 하나당 추출 비용 측정: python -m utils.keyword_matcher
+    import timeit
+
+    from utils.date_parser import DATE_RE
+
+    date_patterns = [r"이번 주말", r"내일", r"모레", r"다음주\s*[월화수목금토일]", r"\d{4}-\d{2}-\d{2}", r"오늘"]
+
+    def naive(message):
+        # 이전 chat_api의 방식: 요청마다 키워드 목록을 만들고 패턴을 하나씩 검색
+        location_keywords = list(global_lat_lon.keys()) + seoul_keywords + gyeonggi_keywords
+        location = next((loc for loc in location_keywords if loc in message), None)
+        date_text = next((m.group(0) for pat in date_patterns if (m := re.search(pat, message))), None)
+        return location, date_text
+
+    messages = [
+        "내일 강남에서 데이트하기 좋은 코스 추천해줘",
+        "다음주 토요일에 부산 여행 가는데 날씨 어때?",
+        "2025-05-03 수원 화성 근처 맛집 알려줘",
+        "오늘 저녁 뭐 먹지",
+        "이번 주말에 아이랑 갈 만한 실내 놀이터가 있을까? 비가 온다고 해서 실내 위주로 찾고 있어",
+    ]
+    for message in messages:
+        print(message, "->", extract_mentions(message))
+    number = 20000
+    def scan_only(message):
+        # naive와 같은 결과(지역 키워드, 날짜 문자열)만 찾는 비용
+        match, date_match = location_matcher.first(message), DATE_RE.search(message)
+        return (match.keyword if match else None), (date_match.group(0) if date_match else None)
+
+    # extract_mentions는 날짜 문자열을 실제 날짜 기간으로 해석하는 비용까지 포함합니다.
+    for name, func in (("naive", naive), ("matcher (scan only)", scan_only), ("extract_mentions", extract_mentions)):
+        seconds = timeit.timeit(lambda: [func(m) for m in messages], number=number)
+        print(f"{name}: {seconds / (number * len(messages)) * 1e6:.2f} us/message")
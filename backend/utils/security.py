@@ -1,10 +1,120 @@
+"""
+비밀번호 해시(bcrypt) 생성 및 검증 함수를 제공합니다.
+bcrypt는 호출마다 수백 ms의 CPU를 사용하므로, 요청 처리에서는 전용 프로세스 풀에서 실행하는 *_async 함수를 사용합니다.
+"""
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
 import bcrypt
+from fastapi import HTTPException
+
+from config import BCRYPT_ROUNDS, BCRYPT_POOL_WORKERS, BCRYPT_MAX_PENDING
+
+
+class PasswordPoolBusy(HTTPException):
+    """비밀번호 해시 작업 대기열이 가득 찼을 때 발생합니다. (429 Too Many Requests)"""
+    def __init__(self):
+        super().__init__(
+            status_code=429,
+            detail="요청이 많아 처리할 수 없습니다. 잠시 후 다시 시도해주세요.",
+            headers={"Retry-After": "1"},
+        )
+
+
+_pool = None
+_pool_lock = threading.Lock()
+# 프로세스 풀에 제출되어 실행 중이거나 대기 중인 작업 수
+_pending = 0
 
 
-def hash_password(password: str) -> str:
-    salt = bcrypt.gensalt()
+def hash_password(password: str, rounds: int = BCRYPT_ROUNDS) -> str:
+    salt = bcrypt.gensalt(rounds=rounds)
     return bcrypt.hashpw(password.encode("utf-8"), salt).decode("utf-8")
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return bcrypt.checkpw(plain_password.encode("utf-8"), hashed_password.encode("utf-8"))
+
+
+def needs_rehash(hashed_password: str) -> bool:
+    """저장된 해시의 cost가 현재 설정(BCRYPT_ROUNDS)과 다르면 True를 반환합니다."""
+    try:
+        return int(hashed_password.split("$")[2]) != BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return True
+
+
+def _mp_context():
+    # 여러 스레드가 실행 중인 서버 프로세스를 fork하면 자식 프로세스가 잠금 상태를 물려받아 멈출 수 있으므로,
+    # 깨끗한 프로세스에서 작업 프로세스를 만드는 forkserver(지원하지 않는 OS에서는 spawn)를 사용합니다.
+    method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    return multiprocessing.get_context(method)
+
+
+def start_pool() -> ProcessPoolExecutor:
+    """프로세스 풀을 만듭니다. 애플리케이션 시작(lifespan) 시 호출합니다."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=BCRYPT_POOL_WORKERS, mp_context=_mp_context())
+        return _pool
+
+
+def _reset_pool(broken: ProcessPoolExecutor) -> None:
+    """작업 프로세스가 비정상 종료되어 사용할 수 없게 된 풀을 버립니다. 다음 호출에서 새 풀을 만듭니다."""
+    global _pool
+    with _pool_lock:
+        if _pool is broken:
+            _pool = None
+    broken.shutdown(wait=False, cancel_futures=True)
+
+
+async def _run_in_pool(func, *args):
+    """
+    func를 비밀번호 전용 프로세스 풀에서 실행합니다.
+    대기 중인 작업이 BCRYPT_MAX_PENDING개 이상이면 기다리지 않고 PasswordPoolBusy(429)를 발생시킵니다.
+    """
+    global _pending
+    with _pool_lock:
+        if _pending >= BCRYPT_MAX_PENDING:
+            raise PasswordPoolBusy()
+        _pending += 1
+    try:
+        loop = asyncio.get_running_loop()
+        # 작업 프로세스가 비정상 종료되면 풀을 새로 만들어 한 번 더 시도합니다.
+        for attempt in range(2):
+            pool = start_pool()
+            try:
+                return await loop.run_in_executor(pool, func, *args)
+            except BrokenProcessPool:
+                print("비밀번호 해시 프로세스 풀이 중단되어 다시 만듭니다.")
+                _reset_pool(pool)
+                if attempt:
+                    raise
+    finally:
+        with _pool_lock:
+            _pending -= 1
+
+
+async def hash_password_async(password: str) -> str:
+    return await _run_in_pool(hash_password, password, BCRYPT_ROUNDS)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await _run_in_pool(verify_password, plain_password, hashed_password)
+
+
+def pool_stats() -> dict:
+    return {"workers": BCRYPT_POOL_WORKERS, "pending": _pending, "max_pending": BCRYPT_MAX_PENDING, "rounds": BCRYPT_ROUNDS}
+
+
+def shutdown_pool() -> None:
+    """애플리케이션 종료 시 프로세스 풀을 정리합니다."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
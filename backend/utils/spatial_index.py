@@ -0,0 +1,148 @@
+"""
+위도/경도 좌표에 대한 격자(grid) 기반 공간 인덱스를 제공합니다.
+영역(bbox) 조회와 반경 조회를 전체 데이터 순회 없이 처리합니다.
+"""
+import math
+from array import array
+from typing import Dict, List, Sequence, Tuple
+
+EARTH_RADIUS_M = 6371008.8
+
+
+def haversine_m(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """두 좌표 사이의 거리를 미터 단위로 계산합니다."""
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp = p2 - p1
+    dl = math.radians(lng2 - lng1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(a)))
+
+
+def _cells_in_range(cells: Dict[Tuple[int, int], object], y0: int, x0: int, y1: int, x1: int):
+    """격자 칸 범위 [y0..y1] x [x0..x1]에 속하는 칸의 값을 순회합니다."""
+    # 범위가 넓어 빈 칸이 대부분이면 실제로 존재하는 칸만 순회합니다.
+    if (y1 - y0 + 1) * (x1 - x0 + 1) > len(cells):
+        for (cy, cx), value in cells.items():
+            if y0 <= cy <= y1 and x0 <= cx <= x1:
+                yield value
+    else:
+        for cy in range(y0, y1 + 1):
+            for cx in range(x0, x1 + 1):
+                value = cells.get((cy, cx))
+                if value is not None:
+                    yield value
+
+
+class GridIndex:
+    """
+    좌표를 고정 크기(cell_deg)의 격자 칸으로 나누어 칸별 인덱스 목록을 보관합니다.
+    """
+    def __init__(self, lats: Sequence[float], lngs: Sequence[float], cell_deg: float = 0.01):
+        self.lats = lats
+        self.lngs = lngs
+        self.cell_deg = cell_deg
+        self.cells: Dict[Tuple[int, int], array] = {}
+        for idx, (lat, lng) in enumerate(zip(lats, lngs)):
+            key = self._cell(lat, lng)
+            bucket = self.cells.get(key)
+            if bucket is None:
+                bucket = self.cells[key] = array('I')
+            bucket.append(idx)
+
+    def _cell(self, lat: float, lng: float) -> Tuple[int, int]:
+        return math.floor(lat / self.cell_deg), math.floor(lng / self.cell_deg)
+
+    def query_bbox(self, south: float, west: float, north: float, east: float) -> List[int]:
+        """영역 안에 있는 좌표의 인덱스 목록을 반환합니다."""
+        y0, x0 = self._cell(south, west)
+        y1, x1 = self._cell(north, east)
+        lats, lngs = self.lats, self.lngs
+        result = []
+        for bucket in _cells_in_range(self.cells, y0, x0, y1, x1):
+            for idx in bucket:
+                if south <= lats[idx] <= north and west <= lngs[idx] <= east:
+                    result.append(idx)
+        return result
+
+    def query_radius(self, lat: float, lng: float, radius_m: float) -> List[Tuple[int, float]]:
+        """중심 좌표에서 반경 안에 있는 (인덱스, 거리) 목록을 가까운 순으로 반환합니다."""
+        dlat = math.degrees(radius_m / EARTH_RADIUS_M)
+        cos_lat = max(math.cos(math.radians(lat)), 1e-6)
+        dlng = min(180.0, dlat / cos_lat)
+        hits = []
+        for idx in self.query_bbox(lat - dlat, lng - dlng, lat + dlat, lng + dlng):
+            dist = haversine_m(lat, lng, self.lats[idx], self.lngs[idx])
+            if dist <= radius_m:
+                hits.append((idx, dist))
+        hits.sort(key=lambda hit: hit[1])
+        return hits
+
+
+class Cluster:
+    """하나의 격자 칸에 모인 좌표들의 개수, 좌표 합, 대표 좌표 인덱스를 보관합니다."""
+    __slots__ = ("count", "sum_lat", "sum_lng", "rep", "rep_weight")
+
+    def __init__(self, count: int, sum_lat: float, sum_lng: float, rep: int, rep_weight: int):
+        self.count = count
+        self.sum_lat = sum_lat
+        self.sum_lng = sum_lng
+        self.rep = rep
+        self.rep_weight = rep_weight
+
+    @property
+    def lat(self) -> float:
+        return self.sum_lat / self.count
+
+    @property
+    def lng(self) -> float:
+        return self.sum_lng / self.count
+
+
+class ClusterHierarchy:
+    """
+    확대 수준(level)별 클러스터를 미리 계산해 둔 계층형 격자입니다.
+    level이 1 올라갈 때마다 칸의 크기가 2배가 되며, 상위 level은 하위 level의 칸 4개를 합쳐 만듭니다.
+    """
+    def __init__(self, lats: Sequence[float], lngs: Sequence[float], base_cell_deg: float, levels: int):
+        self.base_cell_deg = base_cell_deg
+        self.levels: List[Dict[Tuple[int, int], Cluster]] = []
+
+        cells: Dict[Tuple[int, int], Cluster] = {}
+        for idx, (lat, lng) in enumerate(zip(lats, lngs)):
+            key = (math.floor(lat / base_cell_deg), math.floor(lng / base_cell_deg))
+            cluster = cells.get(key)
+            if cluster is None:
+                cells[key] = Cluster(1, lat, lng, idx, 1)
+            else:
+                cluster.count += 1
+                cluster.sum_lat += lat
+                cluster.sum_lng += lng
+        self.levels.append(cells)
+
+        for _ in range(1, levels):
+            merged: Dict[Tuple[int, int], Cluster] = {}
+            for (cy, cx), child in cells.items():
+                key = (cy >> 1, cx >> 1)
+                cluster = merged.get(key)
+                if cluster is None:
+                    merged[key] = Cluster(child.count, child.sum_lat, child.sum_lng, child.rep, child.count)
+                else:
+                    cluster.count += child.count
+                    cluster.sum_lat += child.sum_lat
+                    cluster.sum_lng += child.sum_lng
+                    # 가장 많은 좌표를 가진 하위 칸의 대표를 상위 칸의 대표로 삼습니다.
+                    if child.count > cluster.rep_weight:
+                        cluster.rep, cluster.rep_weight = child.rep, child.count
+            cells = merged
+            self.levels.append(cells)
+
+    def query(self, level: int, south: float, west: float, north: float, east: float) -> List[Cluster]:
+        """level(1부터 시작)의 클러스터 중 중심이 영역 안에 있는 것을 반환합니다."""
+        cells = self.levels[level - 1]
+        cell_deg = self.base_cell_deg * (1 << (level - 1))
+        y0, x0 = math.floor(south / cell_deg), math.floor(west / cell_deg)
+        y1, x1 = math.floor(north / cell_deg), math.floor(east / cell_deg)
+        return [
+            cluster for cluster in _cells_in_range(cells, y0, x0, y1, x1)
+            if south <= cluster.lat <= north and west <= cluster.lng <= east
+        ]